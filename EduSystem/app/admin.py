@@ -1,5 +1,19 @@
+import re
+
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import BooleanField, Case, Count, ExpressionWrapper, Max, Q, QuerySet, Value, When
+from django.http import JsonResponse
+from django.urls import path
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.functional import cached_property
 from django.utils.html import format_html
+from django.utils.http import quote_etag
 from .models import (
     Department,
     Program,
@@ -17,18 +31,224 @@ from .models import (
 )
 
 
+# ============================================================
+# 0. SHARED ADMIN HELPERS
+# ============================================================
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+$")
+PHONE_RE = re.compile(r"^\+?\d{7,15}$")
+REGISTRATION_NO_RE = re.compile(r"^(?=.*\d)[A-Za-z0-9/-]{5,}$")
+ID_RE = re.compile(r"^\d+$")
+
+
+class ExactSearchMixin:
+    """
+    Resolve search terms that look like a unique value (email, phone, ID)
+    with a single indexed equality lookup instead of OR'ing an ILIKE over
+    every search field. Falls back to the regular search when the term
+    is ambiguous or the exact lookup finds nothing.
+    """
+    exact_search_lookups = ()  # ((compiled_regex, lookup), ...) tried in order
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        for pattern, lookup in self.exact_search_lookups:
+            if pattern.match(term):
+                exact = queryset.filter(**{lookup: term})
+                if exact.exists():
+                    return exact, False
+                break
+        return super().get_search_results(request, queryset, search_term)
+
+
+class ChangelistOnlyMixin:
+    """
+    Load only `list_only_fields` on the changelist so wide columns that
+    list_display never shows (TextField / ImageField) are not fetched per
+    row. Change forms and other admin views still load full rows.
+    """
+    list_only_fields = ()
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        opts = self.model._meta
+        match = request.resolver_match
+        if (
+            self.list_only_fields
+            and match
+            and match.url_name == f"{opts.app_label}_{opts.model_name}_changelist"
+        ):
+            queryset = queryset.only(*self.list_only_fields)
+        return queryset
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for large tables: an unfiltered changelist reads the
+    planner's row estimate instead of running COUNT(*) over the table.
+    Filtered querysets, small tables and databases without a cheap
+    estimate (SQLite) still get an exact count.
+    """
+    estimate_threshold = 10000
+
+    @cached_property
+    def count(self):
+        estimate = self.estimated_count()
+        if estimate is None or estimate < self.estimate_threshold:
+            return super().count
+        return estimate
+
+    def estimated_count(self):
+        if not isinstance(self.object_list, QuerySet) or self.object_list.query.where:
+            return None
+        connection = connections[self.object_list.db]
+        table = self.object_list.model._meta.db_table
+        if connection.vendor == "postgresql":
+            sql = "SELECT reltuples::bigint FROM pg_class WHERE relname = %s"
+        elif connection.vendor == "mysql":
+            sql = (
+                "SELECT table_rows FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s"
+            )
+        else:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+        return int(row[0]) if row and row[0] is not None and row[0] >= 0 else None
+
+
+FILTER_CHOICES_TIMEOUT = 60
+
+
+class CachedAllValuesFieldListFilter(admin.AllValuesFieldListFilter):
+    """AllValuesFieldListFilter whose SELECT DISTINCT is cached per (model, field)."""
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        lookup_choices = self.lookup_choices
+        self.lookup_choices = cache.get_or_set(
+            f"admin-filter:{model._meta.label_lower}:{field_path}",
+            lambda: list(lookup_choices),
+            FILTER_CHOICES_TIMEOUT,
+        )
+
+
+class CachedRelatedFieldListFilter(admin.RelatedFieldListFilter):
+    """RelatedFieldListFilter whose related-object choices are cached per (model, field)."""
+
+    def field_choices(self, field, request, model_admin):
+        return cache.get_or_set(
+            f"admin-filter:{field.model._meta.label_lower}:{field.name}",
+            lambda: super(CachedRelatedFieldListFilter, self).field_choices(field, request, model_admin),
+            FILTER_CHOICES_TIMEOUT,
+        )
+
+
+class AutocompleteFilter(admin.SimpleListFilter):
+    """
+    Sidebar filter on a foreign key rendered as the admin's select2
+    autocomplete box. Options are fetched on demand from the
+    admin:autocomplete endpoint, so the changelist no longer SELECTs every
+    related row to build the sidebar. Subclasses set `field_name`; the
+    related model's admin must define search_fields, and the ModelAdmin
+    using the filter must include AutocompleteFilterMixin for the assets.
+    """
+    template = "admin/autocomplete_filter.html"
+    field_name = None
+
+    def __init__(self, request, params, model, model_admin):
+        self.field = model._meta.get_field(self.field_name)
+        self.parameter_name = f"{self.field_name}__{self.field.target_field.name}__exact"
+        if self.title is None:
+            self.title = self.field.verbose_name
+        super().__init__(request, params, model, model_admin)
+        self.admin_site = model_admin.admin_site
+
+    def has_output(self):
+        return True
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def queryset(self, request, queryset):
+        if self.value():
+            try:
+                return queryset.filter(**{self.parameter_name: self.value()})
+            except (ValueError, ValidationError) as e:
+                raise IncorrectLookupParameters(e)
+        return queryset
+
+    def choices(self, changelist):
+        form_field = self.field.formfield(
+            widget=AutocompleteSelect(self.field, self.admin_site), required=False
+        )
+        yield {
+            "selected": self.value() is not None,
+            "parameter_name": self.parameter_name,
+            "widget": form_field.widget.render(self.parameter_name, self.value()),
+        }
+
+
+class SemesterListFilter(admin.SimpleListFilter):
+    """Semester filter over the fixed Course.SEMESTERS choices; no SELECT DISTINCT per render."""
+    title = "semester"
+    parameter_name = "semester"
+
+    def lookups(self, request, model_admin):
+        return Course.SEMESTERS
+
+    def queryset(self, request, queryset):
+        if self.value():
+            try:
+                return queryset.filter(semester=self.value())
+            except (ValueError, ValidationError) as e:
+                raise IncorrectLookupParameters(e)
+        return queryset
+
+
+class AutocompleteFilterMixin:
+    """Pull in the select2 / autocomplete assets AutocompleteFilter renders with."""
+
+    @property
+    def media(self):
+        return super().media + AutocompleteSelect(None, self.admin_site).media
+
+
+class CourseAutocompleteFilter(AutocompleteFilter):
+    field_name = "course"
+
+
+class ProgramAutocompleteFilter(AutocompleteFilter):
+    field_name = "program"
+
+
+class ExamAutocompleteFilter(AutocompleteFilter):
+    field_name = "exam"
+
+
+class RecipientStudentAutocompleteFilter(AutocompleteFilter):
+    field_name = "recipient_student"
+
+
+class RecipientStaffAutocompleteFilter(AutocompleteFilter):
+    field_name = "recipient_staff"
+
+
 # ============================================================
 # 1. DEPARTMENT, PROGRAM, COURSE STRUCTURE
 # ============================================================
 @admin.register(Department)
-class DepartmentAdmin(admin.ModelAdmin):
+class DepartmentAdmin(ChangelistOnlyMixin, admin.ModelAdmin):
     list_display = ("code", "name", "hod")
+    list_only_fields = ("code", "name", "hod__full_name", "hod__designation__title")
+    list_select_related = ("hod__designation",)
     search_fields = ("name", "code")
-    list_filter = ("hod",)
+    list_filter = (("hod", CachedRelatedFieldListFilter),)
+    autocomplete_fields = ("hod",)
 
 
 @admin.register(Program)
-class ProgramAdmin(admin.ModelAdmin):
+class ProgramAdmin(ChangelistOnlyMixin, admin.ModelAdmin):
     list_display = (
         "program_number",
         "name",
@@ -37,33 +257,64 @@ class ProgramAdmin(admin.ModelAdmin):
         "department",
         "duration_years",
     )
+    list_only_fields = (
+        "program_number", "name", "code", "program_type", "duration_years",
+        "department__code", "department__name",
+    )
+    list_select_related = ("department",)
     search_fields = ("name", "code")
-    list_filter = ("program_type", "department")
+    list_filter = ("program_type", ("department", CachedRelatedFieldListFilter))
     ordering = ("program_number",)
 
 
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
     list_display = ("code", "title", "program", "semester", "credit_hours")
+    list_select_related = ("program",)
     search_fields = ("code", "title", "program__code")
-    list_filter = ("program", "semester")
+    list_filter = (("program", CachedRelatedFieldListFilter), "semester")
 
 
 # ============================================================
 # 2. STUDENT MANAGEMENT
 # ============================================================
 @admin.register(Student)
-class StudentAdmin(admin.ModelAdmin):
+class StudentAdmin(ExactSearchMixin, ChangelistOnlyMixin, admin.ModelAdmin):
     list_display = (
         "registration_no",
         "full_name",
         "gender",
         "program",
         "enrollment_year",
+        "age_display",
         "is_active",
     )
+    list_only_fields = (
+        "registration_no", "full_name", "gender", "enrollment_year", "is_active",
+        "program__program_number", "program__name", "program__code",
+    )
     search_fields = ("registration_no", "full_name", "email", "phone")
-    list_filter = ("program", "gender", "enrollment_year", "is_active")
+    exact_search_lookups = (
+        (EMAIL_RE, "email__iexact"),
+        (PHONE_RE, "phone__exact"),
+        (REGISTRATION_NO_RE, "registration_no__iexact"),
+    )
+    list_filter = (
+        ("program", CachedRelatedFieldListFilter),
+        "gender",
+        ("enrollment_year", CachedAllValuesFieldListFilter),
+        "is_active",
+    )
+    autocomplete_fields = ("user", "program")
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("program").with_age()
+
+    def age_display(self, obj):
+        return obj.age
+
+    age_display.short_description = "Age"
+    age_display.admin_order_field = "age"
 
 
 # ============================================================
@@ -76,7 +327,7 @@ class DesignationAdmin(admin.ModelAdmin):
 
 
 @admin.register(Staff)
-class StaffAdmin(admin.ModelAdmin):
+class StaffAdmin(ExactSearchMixin, ChangelistOnlyMixin, admin.ModelAdmin):
     list_display = (
         "full_name",
         "staff_type",
@@ -86,49 +337,91 @@ class StaffAdmin(admin.ModelAdmin):
         "phone",
         "is_active",
     )
+    list_only_fields = (
+        "full_name", "staff_type", "email", "phone", "is_active",
+        "designation__title", "department__code", "department__name",
+    )
     search_fields = ("full_name", "email", "phone")
-    list_filter = ("staff_type", "designation", "department", "is_active")
+    exact_search_lookups = (
+        (EMAIL_RE, "email__iexact"),
+        (PHONE_RE, "phone__exact"),
+    )
+    list_filter = (
+        "staff_type",
+        ("designation", CachedRelatedFieldListFilter),
+        ("department", CachedRelatedFieldListFilter),
+        "is_active",
+    )
+    autocomplete_fields = ("user", "designation", "department")
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("designation", "department")
 
 
 # ============================================================
 # 4. ADMISSIONS & ENROLLMENT
 # ============================================================
 @admin.register(Admission)
-class AdmissionAdmin(admin.ModelAdmin):
+class AdmissionAdmin(AutocompleteFilterMixin, admin.ModelAdmin):
     list_display = ("student", "program", "admission_date", "status")
-    search_fields = ("student__full_name", "program__name")
-    list_filter = ("status", "program")
+    list_select_related = ("student", "program")
+    # istartswith; served on PostgreSQL by the UPPER() index on Student.Meta
+    search_fields = ("^student__registration_no",)
+    search_help_text = "Search by student registration no. (prefix match)."
+    list_filter = ("status", ProgramAutocompleteFilter)
+    autocomplete_fields = ("student", "program")
 
 
 @admin.register(Enrollment)
-class EnrollmentAdmin(admin.ModelAdmin):
+class EnrollmentAdmin(AutocompleteFilterMixin, admin.ModelAdmin):
     list_display = ("student", "course", "semester", "year", "date_enrolled")
-    search_fields = ("student__full_name", "course__code")
-    list_filter = ("semester", "year", "course")
+    list_select_related = ("student", "course__program")
+    search_fields = ("^student__registration_no",)
+    search_help_text = "Search by student registration no. (prefix match)."
+    list_filter = (
+        SemesterListFilter,
+        ("year", CachedAllValuesFieldListFilter),
+        CourseAutocompleteFilter,
+    )
+    autocomplete_fields = ("student", "course")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 # ============================================================
 # 5. ATTENDANCE & EXAMS
 # ============================================================
 @admin.register(Attendance)
-class AttendanceAdmin(admin.ModelAdmin):
+class AttendanceAdmin(AutocompleteFilterMixin, admin.ModelAdmin):
     list_display = ("student", "course", "date", "status")
-    search_fields = ("student__full_name", "course__code")
-    list_filter = ("status", "course")
+    list_select_related = ("student", "course__program")
+    search_fields = ("^student__registration_no",)
+    search_help_text = "Search by student registration no. (prefix match)."
+    list_filter = ("status", CourseAutocompleteFilter)
+    autocomplete_fields = ("student", "course")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Exam)
-class ExamAdmin(admin.ModelAdmin):
+class ExamAdmin(AutocompleteFilterMixin, admin.ModelAdmin):
     list_display = ("course", "exam_type", "date", "total_marks")
+    list_select_related = ("course__program",)
     search_fields = ("course__code", "exam_type")
-    list_filter = ("exam_type", "course")
+    list_filter = ("exam_type", CourseAutocompleteFilter)
+    autocomplete_fields = ("course",)
 
 
 @admin.register(Grade)
-class GradeAdmin(admin.ModelAdmin):
+class GradeAdmin(AutocompleteFilterMixin, admin.ModelAdmin):
     list_display = ("student", "exam", "obtained_marks")
-    search_fields = ("student__full_name", "exam__course__code")
-    list_filter = ("exam",)
+    list_select_related = ("student", "exam__course")
+    search_fields = ("^student__registration_no",)
+    search_help_text = "Search by student registration no. (prefix match)."
+    list_filter = (ExamAutocompleteFilter,)
+    autocomplete_fields = ("student", "exam")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 # ============================================================
@@ -136,16 +429,30 @@ class GradeAdmin(admin.ModelAdmin):
 # ============================================================
 @admin.register(Fee)
 class FeeAdmin(admin.ModelAdmin):
-    list_display = ("student", "amount", "due_date", "is_paid", "payment_date")
-    search_fields = ("student__full_name",)
+    list_display = ("student", "amount", "due_date", "status_display", "is_paid", "payment_date")
+    list_select_related = ("student",)
+    search_fields = ("^student__registration_no",)
+    search_help_text = "Search by student registration no. (prefix match)."
     list_filter = ("is_paid",)
+    autocomplete_fields = ("student",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            status_annot=Case(When(is_paid=True, then=Value("Paid")), default=Value("Unpaid"))
+        )
+
+    def status_display(self, obj):
+        return obj.status_annot
+
+    status_display.short_description = "Status"
+    status_display.admin_order_field = "status_annot"
 
 
 # ============================================================
 # 6. Notification
 # ============================================================
 @admin.register(Notification)
-class NotificationAdmin(admin.ModelAdmin):
+class NotificationAdmin(ExactSearchMixin, ChangelistOnlyMixin, AutocompleteFilterMixin, admin.ModelAdmin):
     list_display = (
         "notif_type",
         "title_display",
@@ -155,20 +462,39 @@ class NotificationAdmin(admin.ModelAdmin):
         "read",
         "auto_resolved",
     )
-    list_filter = ("notif_type", "read", "auto_resolved", "created_at")
-    search_fields = (
-        "title",
-        "message",
-        "recipient_student__full_name",
-        "recipient_staff__full_name",
+    list_only_fields = (
+        "notif_type", "title", "created_at", "read", "auto_resolved",
+        "recipient_student__full_name", "recipient_student__registration_no",
+        "recipient_staff__full_name", "recipient_staff__designation__title",
     )
+    list_filter = (
+        ("notif_type", CachedAllValuesFieldListFilter),
+        "read",
+        "auto_resolved",
+        "created_at",
+        RecipientStudentAutocompleteFilter,
+        RecipientStaffAutocompleteFilter,
+    )
+    search_fields = ("title", "message", "notif_type")
+    exact_search_lookups = ((ID_RE, "pk__exact"),)
     readonly_fields = ("created_at",)
+    autocomplete_fields = ("recipient_student", "recipient_staff")
     ordering = ("-created_at",)
     list_per_page = 20
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("recipient_student", "recipient_staff__designation")
+            .annotate(is_unread=ExpressionWrapper(~Q(read=True), output_field=BooleanField()))
+        )
 
     # Bold unread notifications & highlight auto-resolved in green
     def title_display(self, obj):
-        if not obj.read:
+        if obj.is_unread:
             return format_html("<b>{}</b>", obj.title)
         elif obj.auto_resolved:
             return format_html("<span style='color:green'>{}</span>", obj.title)
@@ -176,5 +502,37 @@ class NotificationAdmin(admin.ModelAdmin):
 
     title_display.short_description = "Title"
 
-    # Auto-refresh changelist every 10 seconds (optional)
-    change_list_template = "admin/notifications_changelist.html"
\ No newline at end of file
+    # Changelist polls poll_view and reloads only when a new notification lands
+    change_list_template = "admin/notifications_changelist.html"
+    poll_timeout = 5
+
+    def get_urls(self):
+        opts = self.model._meta
+        return [
+            path(
+                "poll/",
+                self.admin_site.admin_view(self.poll_view, cacheable=True),
+                name=f"{opts.app_label}_{opts.model_name}_poll",
+            ),
+        ] + super().get_urls()
+
+    def poll_view(self, request):
+        """
+        Tiny JSON feed for the changelist auto-refresh. The aggregate is
+        shared through the cache for `poll_timeout` seconds and answered
+        with 304 when the client's ETag still matches.
+        """
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        state = cache.get_or_set(
+            "admin-notification-poll",
+            lambda: self.model._default_manager.aggregate(
+                latest_id=Max("pk"), unread_count=Count("pk", filter=Q(read=False))
+            ),
+            self.poll_timeout,
+        )
+        etag = quote_etag(f"{state['latest_id']}-{state['unread_count']}")
+        response = get_conditional_response(request, etag=etag) or JsonResponse(state)
+        response.headers["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
\ No newline at end of file
@@ -7,3 +7,12 @@ class AppConfigConfig(AppConfig):
 
     def ready(self):
         import app.signals
+        from django.db.models.functions import Collate
+        from django.db.models.indexes import IndexExpression
+        from .models import PostgresOpClass
+
+        # As django.contrib.postgres does for OpClass: render the opclass
+        # after the parenthesised index expression, not inside it
+        wrappers = list(IndexExpression.wrapper_classes)
+        wrappers.insert(wrappers.index(Collate), PostgresOpClass)
+        IndexExpression.register_wrappers(*wrappers)
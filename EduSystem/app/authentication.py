@@ -0,0 +1,16 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .models import ProfileUser
+
+
+class ProfileJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that loads users through ProfileUser, whose manager
+    JOINs the UserProfile, so role checks read the already-loaded row
+    instead of issuing a second query per request. Token validation and
+    the user checks are simplejwt's own.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user_model = ProfileUser
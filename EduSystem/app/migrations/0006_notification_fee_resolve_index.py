@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-14 19:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_add_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient_student', 'notif_type', 'read'], name='app_notific_recipie_f39026_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-14 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0006_notification_fee_resolve_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fee',
+            index=models.Index(fields=['student', 'is_paid', 'due_date'], name='app_fee_student_6cf300_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient_staff', 'notif_type', 'read'], name='app_notific_recipie_6e55c1_idx'),
+        ),
+    ]
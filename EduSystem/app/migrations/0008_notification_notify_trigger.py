@@ -0,0 +1,64 @@
+from django.db import migrations
+
+# Pushes each new notification to LISTEN-ers on notif_student_<id> /
+# notif_staff_<id>. The payload carries the list fields (no message) so it
+# stays well under pg_notify's 8000-byte limit.
+CREATE_TRIGGER = [
+    """
+CREATE OR REPLACE FUNCTION app_notification_notify() RETURNS trigger AS $$
+DECLARE
+    payload text := json_build_object(
+        'id', NEW.id,
+        'recipient_student_id', NEW.recipient_student_id,
+        'recipient_staff_id', NEW.recipient_staff_id,
+        'notif_type', NEW.notif_type,
+        'title', NEW.title,
+        'created_at', NEW.created_at,
+        'read', NEW.read,
+        'auto_resolved', NEW.auto_resolved
+    )::text;
+BEGIN
+    IF NEW.recipient_student_id IS NOT NULL THEN
+        PERFORM pg_notify('notif_student_' || NEW.recipient_student_id, payload);
+    END IF;
+    IF NEW.recipient_staff_id IS NOT NULL THEN
+        PERFORM pg_notify('notif_staff_' || NEW.recipient_staff_id, payload);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+""",
+    """
+CREATE TRIGGER app_notification_notify
+    AFTER INSERT ON app_notification
+    FOR EACH ROW EXECUTE FUNCTION app_notification_notify()
+""",
+]
+
+DROP_TRIGGER = [
+    "DROP TRIGGER IF EXISTS app_notification_notify ON app_notification",
+    "DROP FUNCTION IF EXISTS app_notification_notify()",
+]
+
+
+def create_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for statement in CREATE_TRIGGER:
+            schema_editor.execute(statement)
+
+
+def drop_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for statement in DROP_TRIGGER:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_composite_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigger, drop_trigger),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-15 00:02
+
+import app.models
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_notification_notify_trigger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(app.models.PostgresOpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('registration_no', models.TextField())), name='text_pattern_ops'), name='app_student_reg_no_upper_like'),
+        ),
+    ]
@@ -1,5 +1,8 @@
 from django.db import models
-from django.contrib.auth.models import User
+from django.db.models import Case, Q, Value, When
+from django.db.models.functions import Cast, ExtractYear, Upper
+from django.contrib.postgres.indexes import OpClass
+from django.contrib.auth.models import User, UserManager
 from datetime import date
 from rest_framework.permissions import BasePermission
 from django.db.models.signals import post_save
@@ -25,47 +28,87 @@ class UserProfile(models.Model):
         return f"{self.user.username} - {self.role}"
 
 
+class ProfileUserManager(UserManager):
+    use_in_migrations = False
+
+    def get_queryset(self):
+        return super().get_queryset().select_related("profile")
+
+
+class ProfileUser(User):
+    """User whose default manager JOINs the UserProfile (see ProfileJWTAuthentication)."""
+    objects = ProfileUserManager()
+
+    class Meta:
+        proxy = True
+
+
+def default_role(user):
+    """Role a new user's profile starts with, derived from the auth flags."""
+    if user.is_superuser:
+        return "Admin"
+    if user.is_staff:
+        return "Staff"
+    return "Student"
+
+
 # Auto-create UserProfile when User is created
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
-        if instance.is_superuser:
-            role = "Admin"
-        elif instance.is_staff:
-            role = "Staff"
+        UserProfile.objects.create(user=instance, role=default_role(instance))
+
+
+def get_user_role(user):
+    """
+    Return the user's profile role, cached on the user instance.
+    DRF builds a fresh user per request, so permission checks and
+    querysets in one request share a single lookup.
+    """
+    if not hasattr(user, "_cached_role"):
+        if User.profile.is_cached(user):
+            try:
+                role = user.profile.role
+            except UserProfile.DoesNotExist:
+                role = None
         else:
-            role = "Student"
-        UserProfile.objects.create(user=instance, role=role)
+            role = (
+                UserProfile.objects.filter(user_id=user.pk)
+                .values_list("role", flat=True)
+                .first()
+            )
+        user._cached_role = role
+    return user._cached_role
 
 
 # ============================================================
 # 1. CUSTOM PERMISSIONS (ROLE BASED)
 # ============================================================
 
-class IsAdmin(BasePermission):
-    """Allow access only to admin/superusers."""
-    def has_permission(self, request, view):
-        return request.user and request.user.is_authenticated and (
-            request.user.is_superuser or
-            getattr(request.user.profile, 'role', None) == 'Admin'
-        )
-
+def role_required(*roles, user_flag=None):
+    """
+    Build a permission class allowing users whose profile role is in
+    `roles`, or whose `user_flag` attribute (e.g. "is_superuser") is set.
+    Roles come from get_user_role, so composed permissions (`IsAdmin |
+    IsStaff`) share one profile lookup per request.
+    """
+    class RoleRequired(BasePermission):
+        def has_permission(self, request, view):
+            user = request.user
+            if not (user and user.is_authenticated):
+                return False
+            if user_flag and getattr(user, user_flag, False):
+                return True
+            return get_user_role(user) in roles
 
-class IsStaff(BasePermission):
-    """Allow access only to staff users."""
-    def has_permission(self, request, view):
-        return request.user and request.user.is_authenticated and (
-            request.user.is_staff or
-            getattr(request.user.profile, 'role', None) == 'Staff'
-        )
+    RoleRequired.__name__ = RoleRequired.__qualname__ = f"RoleRequired_{'_'.join(roles)}"
+    RoleRequired.__doc__ = f"Allow access only to {'/'.join(roles)} users."
+    return RoleRequired
 
 
-class IsStudent(BasePermission):
-    """Allow access only to students."""
-    def has_permission(self, request, view):
-        return request.user and request.user.is_authenticated and (
-            getattr(request.user.profile, 'role', None) == 'Student'
-        )
+IsAdmin = role_required("Admin", user_flag="is_superuser")
+IsStaff = role_required("Staff", user_flag="is_staff")
+IsStudent = role_required("Student")
 
 
 class RoleBasedPermission(BasePermission):
@@ -77,8 +120,7 @@ class RoleBasedPermission(BasePermission):
         allowed_roles = getattr(view, 'allowed_roles', [])
         if not request.user.is_authenticated:
             return False
-        role = getattr(request.user.profile, 'role', None)
-        return role in allowed_roles
+        return get_user_role(request.user) in allowed_roles
 
 
 # ============================================================
@@ -123,7 +165,7 @@ class Program(models.Model):
 
 
 class Course(models.Model):
-    SEMESTERS = [(i, f"Semester {i}") for i in range(1, 9)]
+    SEMESTERS = tuple((i, f"Semester {i}") for i in range(1, 9))
 
     code = models.CharField(max_length=20, unique=True)
     title = models.CharField(max_length=150)
@@ -153,6 +195,32 @@ class Course(models.Model):
 # 3. STUDENT MANAGEMENT
 # ============================================================
 
+class StudentQuerySet(models.QuerySet):
+    def with_age(self):
+        """Annotate `age` in SQL instead of computing it per row in Python."""
+        today = date.today()
+        birthday_pending = Q(dob__month__gt=today.month) | Q(
+            dob__month=today.month, dob__day__gt=today.day
+        )
+        return self.annotate(
+            age=Value(today.year)
+            - ExtractYear("dob")
+            - Case(When(birthday_pending, then=Value(1)), default=Value(0)),
+        )
+
+
+class PostgresOpClass(OpClass):
+    """OpClass that other backends (SQLite in development) index without.
+
+    Registered as an index expression wrapper in AppConfig.ready().
+    """
+
+    def as_sql(self, compiler, connection, **extra_context):
+        if connection.vendor != "postgresql":
+            return compiler.compile(self.source_expressions[0])
+        return super().as_sql(compiler, connection, **extra_context)
+
+
 class Student(models.Model):
     GENDER_CHOICES = [
         ("Male", "Male"),
@@ -177,8 +245,31 @@ class Student(models.Model):
     is_active = models.BooleanField(default=True)
     photo = models.ImageField(upload_to="students/photos/", blank=True, null=True)
 
+    objects = StudentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["enrollment_year"]),
+            models.Index(fields=["program", "is_active"]),
+            # Admin "^student__registration_no" searches compile to
+            # UPPER("registration_no"::text) LIKE UPPER('x%') on PostgreSQL,
+            # which the unique btree cannot serve; this matches it exactly.
+            models.Index(
+                PostgresOpClass(
+                    Upper(Cast("registration_no", models.TextField())),
+                    name="text_pattern_ops",
+                ),
+                name="app_student_reg_no_upper_like",
+            ),
+        ]
+
+    _age = None
+
     @property
     def age(self):
+        # Set by StudentQuerySet.with_age() when the age was computed in SQL
+        if self._age is not None:
+            return self._age
         today = date.today()
         return (
             today.year
@@ -186,6 +277,10 @@ class Student(models.Model):
             - ((today.month, today.day) < (self.dob.month, self.dob.day))
         )
 
+    @age.setter
+    def age(self, value):
+        self._age = value
+
     def __str__(self):
         return f"{self.full_name} ({self.registration_no})"
 
@@ -246,6 +341,9 @@ class Admission(models.Model):
     admission_date = models.DateField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="Pending")
 
+    class Meta:
+        indexes = [models.Index(fields=["status"])]
+
     def __str__(self):
         return f"Admission: {self.student.full_name} - {self.status}"
 
@@ -282,6 +380,10 @@ class Attendance(models.Model):
 
     class Meta:
         unique_together = ("student", "course", "date")
+        indexes = [
+            models.Index(fields=["date"]),
+            models.Index(fields=["status", "course"]),
+        ]
 
     def __str__(self):
         return f"{self.student.full_name} - {self.course.code} - {self.status}"
@@ -324,6 +426,12 @@ class Fee(models.Model):
     is_paid = models.BooleanField(default=False)
     payment_date = models.DateField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["is_paid", "due_date"]),
+            models.Index(fields=["student", "is_paid", "due_date"]),
+        ]
+
     @property
     def status(self):
         return "Paid" if self.is_paid else "Unpaid"
@@ -346,5 +454,56 @@ class Notification(models.Model):
     read = models.BooleanField(default=False)
     auto_resolved = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at"]),
+            models.Index(fields=["read", "notif_type"]),
+            models.Index(fields=["recipient_student", "notif_type", "read"]),
+            models.Index(fields=["recipient_staff", "notif_type", "read"]),
+        ]
+
     def __str__(self):
         return f"{self.notif_type}: {self.title}"
+
+
+# Signal/task notifications: (notif_type, title, message) per template key.
+# Built once at import and filled with str.format_map, so each event only
+# passes the already-resolved values it needs.
+NOTIFICATION_TEMPLATES = {
+    "admission_created": (
+        "Admission", "Admission Created",
+        "Your admission for {program} has been created with status {status}.",
+    ),
+    "admission_updated": (
+        "Admission Update", "Admission Updated",
+        "Your admission for {program} has been updated with status {status}.",
+    ),
+    "enrollment": (
+        "Enrollment", "Course Enrollment Successful",
+        "You have been enrolled in {course} for Semester {semester} ({year}).",
+    ),
+    "fee_assigned": ("Fee", "New Fee Assigned", "A new fee of {amount} is due on {due_date}."),
+    "fee_overdue": ("Fee", "Fee Overdue", "Your fee of {amount} is overdue!"),
+    "fee_paid": ("Fee", "Fee Paid", "Your fee of {amount} has been paid."),
+    "exam_scheduled": (
+        "Exam", "New Exam Scheduled",
+        "The {exam_type} exam for {course} is scheduled on {date}.",
+    ),
+    "attendance": (
+        "Attendance", "Attendance Recorded",
+        "Your attendance for {course} on {date} has been marked as {status}.",
+    ),
+    "grade": ("Grade", "{exam_type} Exam Results", "You scored {marks} in {course}."),
+    "staff_welcome": ("Staff", "Welcome to Staff", "Welcome {name} to {department}."),
+    "staff_updated": ("Staff", "Staff Record Updated", "Your staff record has been updated."),
+}
+
+
+def render_notification(key, **context):
+    """Notification field values (notif_type, title, message) for a template key."""
+    notif_type, title, message = NOTIFICATION_TEMPLATES[key]
+    return {
+        "notif_type": notif_type,
+        "title": title.format_map(context),
+        "message": message.format_map(context),
+    }
@@ -1,5 +1,7 @@
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
 from .models import (
     UserProfile,
     Department,
@@ -40,12 +42,10 @@ class UserCreateSerializer(serializers.ModelSerializer):
         password = validated_data.pop("password")
         user = User(**validated_data)
         user.set_password(password)
-        user.save()
-        # Auto-create UserProfile
-        UserProfile.objects.create(
-            user=user,
-            role="Admin" if user.is_superuser else "Staff" if user.is_staff else "Student"
-        )
+        # The post_save signal creates the UserProfile; keep both inserts
+        # in one transaction so a failed profile never leaves a bare User.
+        with transaction.atomic():
+            user.save()
         return user
 
 class UserProfileSerializer(serializers.ModelSerializer):
@@ -60,24 +60,30 @@ class UserProfileSerializer(serializers.ModelSerializer):
 # 2. DEPARTMENT, PROGRAM, COURSE (Hyperlinked + Nested)
 # ============================================================
 
-class DepartmentSerializer(serializers.HyperlinkedModelSerializer):
-    """Include related programs as hyperlinks."""
-    programs = serializers.HyperlinkedRelatedField(
-        many=True,
-        read_only=True,
-        view_name="program-detail"  # Ensure your viewsets have 'program-detail' name
-    )
-
+class DepartmentNestedSerializer(serializers.HyperlinkedModelSerializer):
+    """Department as nested in programs and staff: no program count."""
     class Meta:
         model = Department
-        fields = ["id", "name", "code", "description", "hod", "programs"]
+        fields = ["id", "name", "code", "description", "hod"]
         extra_kwargs = {
             'hod': {'view_name': 'staff-detail', 'lookup_field': 'pk'}
         }
 
+class DepartmentSerializer(DepartmentNestedSerializer):
+    """Department with a program count instead of program links."""
+    programs_count = serializers.SerializerMethodField()
+
+    class Meta(DepartmentNestedSerializer.Meta):
+        fields = DepartmentNestedSerializer.Meta.fields + ["programs_count"]
+
+    def get_programs_count(self, obj):
+        # Annotated by DepartmentViewSet; a just-created department is counted directly
+        count = getattr(obj, "programs_count", None)
+        return obj.programs.count() if count is None else count
+
 class ProgramSerializer(serializers.HyperlinkedModelSerializer):
     """Nested department + related courses as hyperlinks."""
-    department = DepartmentSerializer(read_only=True)
+    department = DepartmentNestedSerializer(read_only=True)
     department_id = serializers.PrimaryKeyRelatedField(
         queryset=Department.objects.all(), source="department", write_only=True
     )
@@ -94,6 +100,28 @@ class ProgramSerializer(serializers.HyperlinkedModelSerializer):
             "duration_years", "description", "department", "department_id", "courses"
         ]
 
+class ProgramListSerializer(serializers.ModelSerializer):
+    """Flat program row for list endpoints: department by code, no nested objects."""
+    department_code = serializers.CharField(source="department.code", read_only=True)
+
+    class Meta:
+        model = Program
+        fields = [
+            "id", "program_number", "name", "code", "program_type",
+            "duration_years", "description", "department_code"
+        ]
+
+class BulkCreateListSerializer(serializers.ListSerializer):
+    """`many=True` create that writes all rows with bulk_create instead of one INSERT per item."""
+    batch_size = 1000
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        return model.objects.bulk_create(
+            [model(**attrs) for attrs in validated_data], batch_size=self.batch_size
+        )
+
+
 class CourseSerializer(serializers.HyperlinkedModelSerializer):
     program = ProgramSerializer(read_only=True)
     program_id = serializers.PrimaryKeyRelatedField(
@@ -103,6 +131,13 @@ class CourseSerializer(serializers.HyperlinkedModelSerializer):
     class Meta:
         model = Course
         fields = ["id", "code", "title", "credit_hours", "semester", "program", "program_id"]
+        list_serializer_class = BulkCreateListSerializer
+
+class CourseMiniSerializer(serializers.ModelSerializer):
+    """Lightweight course reference for records that only need to name the course."""
+    class Meta:
+        model = Course
+        fields = ["id", "code", "title"]
 
 # ============================================================
 # 3. STUDENT MANAGEMENT (Nested + validations)
@@ -114,6 +149,7 @@ class StudentSerializer(serializers.ModelSerializer):
     program_id = serializers.PrimaryKeyRelatedField(
         queryset=Program.objects.all(), source="program", write_only=True
     )
+    age = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Student
@@ -122,6 +158,7 @@ class StudentSerializer(serializers.ModelSerializer):
             "email", "phone", "address", "program", "program_id",
             "enrollment_year", "is_active", "photo", "age"
         ]
+        list_serializer_class = BulkCreateListSerializer
 
     def validate_dob(self, value):
         """DOB cannot be in the future."""
@@ -129,6 +166,12 @@ class StudentSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Date of birth cannot be in the future.")
         return value
 
+# Writable student references load what the nested StudentSerializer renders,
+# so write responses don't lazy-load user, program, department and courses
+STUDENT_REFERENCE_QUERYSET = Student.objects.select_related(
+    "user", "program__department"
+).prefetch_related("program__courses")
+
 class StudentCreateSerializer(serializers.ModelSerializer):
     """Separate serializer for creating student with existing user."""
     class Meta:
@@ -153,7 +196,7 @@ class StaffSerializer(serializers.ModelSerializer):
     designation_id = serializers.PrimaryKeyRelatedField(
         queryset=Designation.objects.all(), source="designation", write_only=True
     )
-    department = DepartmentSerializer(read_only=True)
+    department = DepartmentNestedSerializer(read_only=True)
     department_id = serializers.PrimaryKeyRelatedField(
         queryset=Department.objects.all(), source="department", write_only=True
     )
@@ -179,60 +222,81 @@ class StaffCreateSerializer(serializers.ModelSerializer):
 # 5. ADMISSIONS & ENROLLMENT (Validation + nested)
 # ============================================================
 
+class DatabaseUniqueMixin:
+    """
+    Enforce the model's unique_together in the database instead of with a
+    SELECT before every write: the INSERT/UPDATE runs in a savepoint and a
+    constraint violation is reported as a validation error.
+    Pair with `validators = []` in Meta to drop DRF's UniqueTogetherValidator.
+    """
+    unique_error_message = "This record already exists."
+
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [self.unique_error_message]})
+
+    def update(self, instance, validated_data):
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [self.unique_error_message]})
+
+
 class AdmissionSerializer(serializers.ModelSerializer):
     student = StudentSerializer(read_only=True)
-    student_id = serializers.PrimaryKeyRelatedField(queryset=Student.objects.all(), source="student", write_only=True)
+    student_id = serializers.PrimaryKeyRelatedField(queryset=STUDENT_REFERENCE_QUERYSET, source="student", write_only=True)
     program = ProgramSerializer(read_only=True)
-    program_id = serializers.PrimaryKeyRelatedField(queryset=Program.objects.all(), source="program", write_only=True)
+    program_id = serializers.PrimaryKeyRelatedField(
+        queryset=Program.objects.select_related("department").prefetch_related("courses"),
+        source="program",
+        write_only=True,
+    )
 
     class Meta:
         model = Admission
         fields = ["id", "student", "student_id", "program", "program_id", "admission_date", "status"]
 
-class EnrollmentSerializer(serializers.ModelSerializer):
+class EnrollmentSerializer(DatabaseUniqueMixin, serializers.ModelSerializer):
+    unique_error_message = "This student is already enrolled in this course for this semester/year."
+
     student = StudentSerializer(read_only=True)
-    student_id = serializers.PrimaryKeyRelatedField(queryset=Student.objects.all(), source="student", write_only=True)
-    course = CourseSerializer(read_only=True)
+    student_id = serializers.PrimaryKeyRelatedField(queryset=STUDENT_REFERENCE_QUERYSET, source="student", write_only=True)
+    course = CourseMiniSerializer(read_only=True)
     course_id = serializers.PrimaryKeyRelatedField(queryset=Course.objects.all(), source="course", write_only=True)
 
     class Meta:
         model = Enrollment
         fields = ["id", "student", "student_id", "course", "course_id", "semester", "year", "date_enrolled"]
-
-    def validate(self, data):
-        """Prevent duplicate enrollment for same student/course/semester/year"""
-        if Enrollment.objects.filter(
-            student=data["student"], course=data["course"],
-            semester=data["semester"], year=data["year"]
-        ).exists():
-            raise serializers.ValidationError("This student is already enrolled in this course for this semester/year.")
-        return data
+        validators = []
 
 # ============================================================
 # 6. ATTENDANCE & EXAMS
 # ============================================================
 
-class AttendanceSerializer(serializers.ModelSerializer):
+class AttendanceSerializer(DatabaseUniqueMixin, serializers.ModelSerializer):
+    unique_error_message = "Attendance already exists for this student/course/date."
+
     student = StudentSerializer(read_only=True)
-    student_id = serializers.PrimaryKeyRelatedField(queryset=Student.objects.all(), source="student", write_only=True)
-    course = CourseSerializer(read_only=True)
+    student_id = serializers.PrimaryKeyRelatedField(queryset=STUDENT_REFERENCE_QUERYSET, source="student", write_only=True)
+    course = CourseMiniSerializer(read_only=True)
     course_id = serializers.PrimaryKeyRelatedField(queryset=Course.objects.all(), source="course", write_only=True)
 
     class Meta:
         model = Attendance
         fields = ["id", "student", "student_id", "course", "course_id", "date", "status"]
-
-    def validate(self, data):
-        """Unique attendance per student/course/date"""
-        if Attendance.objects.filter(
-            student=data["student"], course=data["course"], date=data["date"]
-        ).exists():
-            raise serializers.ValidationError("Attendance already exists for this student/course/date.")
-        return data
+        validators = []
 
 class ExamSerializer(serializers.ModelSerializer):
     course = CourseSerializer(read_only=True)
-    course_id = serializers.PrimaryKeyRelatedField(queryset=Course.objects.all(), source="course", write_only=True)
+    course_id = serializers.PrimaryKeyRelatedField(
+        queryset=Course.objects.select_related("program__department").prefetch_related("program__courses"),
+        source="course",
+        write_only=True,
+    )
 
     class Meta:
         model = Exam
@@ -240,9 +304,13 @@ class ExamSerializer(serializers.ModelSerializer):
 
 class GradeSerializer(serializers.ModelSerializer):
     student = StudentSerializer(read_only=True)
-    student_id = serializers.PrimaryKeyRelatedField(queryset=Student.objects.all(), source="student", write_only=True)
+    student_id = serializers.PrimaryKeyRelatedField(queryset=STUDENT_REFERENCE_QUERYSET, source="student", write_only=True)
     exam = ExamSerializer(read_only=True)
-    exam_id = serializers.PrimaryKeyRelatedField(queryset=Exam.objects.all(), source="exam", write_only=True)
+    exam_id = serializers.PrimaryKeyRelatedField(
+        queryset=Exam.objects.select_related("course__program__department").prefetch_related("course__program__courses"),
+        source="exam",
+        write_only=True,
+    )
 
     class Meta:
         model = Grade
@@ -259,7 +327,7 @@ class GradeSerializer(serializers.ModelSerializer):
 
 class FeeSerializer(serializers.ModelSerializer):
     student = StudentSerializer(read_only=True)
-    student_id = serializers.PrimaryKeyRelatedField(queryset=Student.objects.all(), source="student", write_only=True)
+    student_id = serializers.PrimaryKeyRelatedField(queryset=STUDENT_REFERENCE_QUERYSET, source="student", write_only=True)
 
     class Meta:
         model = Fee
@@ -277,11 +345,12 @@ class FeeSerializer(serializers.ModelSerializer):
 class NotificationSerializer(serializers.ModelSerializer):
     recipient_student = StudentSerializer(read_only=True)
     recipient_student_id = serializers.PrimaryKeyRelatedField(
-        queryset=Student.objects.all(), source="recipient_student", write_only=True, required=False
+        queryset=STUDENT_REFERENCE_QUERYSET, source="recipient_student", write_only=True, required=False
     )
     recipient_staff = StaffSerializer(read_only=True)
     recipient_staff_id = serializers.PrimaryKeyRelatedField(
-        queryset=Staff.objects.all(), source="recipient_staff", write_only=True, required=False
+        queryset=Staff.objects.select_related("user", "designation", "department"),
+        source="recipient_staff", write_only=True, required=False
     )
 
     class Meta:
@@ -292,3 +361,12 @@ class NotificationSerializer(serializers.ModelSerializer):
             "notif_type", "title", "message", "created_at",
             "read", "auto_resolved"
         ]
+
+class NotificationListSerializer(serializers.ModelSerializer):
+    """Flat notification row for list endpoints: recipient ids, no message body."""
+    class Meta:
+        model = Notification
+        fields = [
+            "id", "recipient_student_id", "recipient_staff_id",
+            "notif_type", "title", "created_at", "read", "auto_resolved"
+        ]
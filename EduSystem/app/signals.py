@@ -1,6 +1,11 @@
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+import logging
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from datetime import date
+from functools import partial
 from .models import (
     Admission,
     Enrollment,
@@ -9,160 +14,298 @@ from .models import (
     Attendance,
     Grade,
     Staff,
+    Student,
     Notification,
+    render_notification,
 )
+from .tasks import create_exam_notifications, create_notifications, settle_fee_notifications
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# 0. NOTIFICATION BATCHING
+# ============================================================
+class CommitHook:
+    """
+    on_commit callback that logs a failure of `func` instead of raising it,
+    so a broker error neither skips the hooks after it nor fails a write
+    that has already committed. (on_commit's own robust=True cannot log
+    partials or callable objects: it reads func.__qualname__.)
+    """
+
+    def __init__(self, func):
+        self.func = func
+
+    def __call__(self):
+        try:
+            self.func()
+        except Exception:
+            logger.exception("on_commit hook %r failed", self.func)
+
+
+def after_commit(func):
+    """Run `func` once the current transaction commits (immediately in autocommit)."""
+    transaction.on_commit(CommitHook(func))
+
+
+class NotificationBatch:
+    """Notifications queued inside one transaction/savepoint, handed to one task on commit."""
+
+    def __init__(self, savepoint_ids):
+        self.savepoint_ids = savepoint_ids
+        self.notifications = []
+
+    def __call__(self):
+        create_notifications.delay(self.notifications)
+
+
+def pending_batches():
+    """NotificationBatches queued by the current transaction and not yet sent."""
+    return [
+        hook.func for _, hook, _ in transaction.get_connection().run_on_commit
+        if isinstance(hook, CommitHook) and isinstance(hook.func, NotificationBatch)
+    ]
+
+
+def queue_notifications(*notifications):
+    """
+    Queue notifications (dicts of Notification field values) for insertion
+    by the create_notifications task, off the request path. Everything
+    queued by signal handlers in the same transaction is sent as a single
+    task on commit and discarded if it rolls back; outside a transaction
+    the task is sent immediately.
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        after_commit(partial(create_notifications.delay, list(notifications)))
+        return
+
+    # Reuse a batch only if it belongs to the current savepoint, so rolling
+    # back a savepoint drops exactly the notifications queued inside it.
+    savepoint_ids = set(connection.savepoint_ids)
+    batch = next((b for b in pending_batches() if b.savepoint_ids == savepoint_ids), None)
+    if batch is None:
+        batch = NotificationBatch(savepoint_ids)
+        after_commit(batch)
+    batch.notifications.extend(notifications)
+
 
 # ============================================================
 # 1. ADMISSION NOTIFICATIONS
 # ============================================================
-@receiver(post_save, sender=Admission)
-def create_admission_notification(sender, instance, created, **kwargs):
+def create_admission_notification(sender, instance, created, raw=False, **kwargs):
     """
     Notify students when their admission is created or updated.
     """
-    notif_type = "Admission" if created else "Admission Update"
-    Notification.objects.create(
-        recipient_student=instance.student,
-        notif_type=notif_type,
-        title=f"Admission {'Created' if created else 'Updated'}",
-        message=f"Your admission for {instance.program.name} has been "
-                f"{'created' if created else 'updated'} with status {instance.status}.",
-    )
+    if raw:
+        return
+    queue_notifications(dict(
+        recipient_student_id=instance.student_id,
+        **render_notification(
+            "admission_created" if created else "admission_updated",
+            program=instance.program.name,
+            status=instance.status,
+        ),
+    ))
 
 
 # ============================================================
 # 2. ENROLLMENT NOTIFICATIONS
 # ============================================================
-@receiver(post_save, sender=Enrollment)
-def create_enrollment_notification(sender, instance, created, **kwargs):
+def create_enrollment_notification(sender, instance, created, raw=False, **kwargs):
     """
     Notify students upon successful course enrollment.
     """
-    if created:
-        Notification.objects.create(
-            recipient_student=instance.student,
-            notif_type="Enrollment",
-            title="Course Enrollment Successful",
-            message=f"You have been enrolled in {instance.course.code} "
-                    f"for Semester {instance.semester} ({instance.year}).",
-        )
+    if created and not raw:
+        queue_notifications(dict(
+            recipient_student_id=instance.student_id,
+            **render_notification(
+                "enrollment",
+                course=instance.course.code,
+                semester=instance.semester,
+                year=instance.year,
+            ),
+        ))
 
 
 # ============================================================
 # 3. FEE NOTIFICATIONS
 # ============================================================
-@receiver(post_save, sender=Fee)
-def create_fee_notification(sender, instance, created, **kwargs):
+def create_fee_notification(sender, instance, created, raw=False, **kwargs):
     """
     Notify students about fee creation, overdue, and payment.
     """
+    if raw:
+        return
     if created and not instance.is_paid:
         # New fee assigned
-        Notification.objects.create(
-            recipient_student=instance.student,
-            notif_type="Fee",
-            title="New Fee Assigned",
-            message=f"A new fee of {instance.amount} is due on {instance.due_date}.",
-        )
+        queue_notifications(dict(
+            recipient_student_id=instance.student_id,
+            fee_id=instance.pk,
+            **render_notification("fee_assigned", amount=instance.amount, due_date=instance.due_date),
+        ))
     elif not created and not instance.is_paid and instance.due_date < date.today():
         # Overdue fee
-        Notification.objects.create(
-            recipient_student=instance.student,
-            notif_type="Fee",
-            title="Fee Overdue",
-            message=f"Your fee of {instance.amount} is overdue!",
-        )
+        queue_notifications(dict(
+            recipient_student_id=instance.student_id,
+            fee_id=instance.pk,
+            **render_notification("fee_overdue", amount=instance.amount),
+        ))
     elif not created and instance.is_paid:
-        # Auto-resolve previous fee notifications
-        Notification.objects.filter(
-            recipient_student=instance.student, notif_type="Fee", read=False
-        ).update(read=True, auto_resolved=True)
-
-        Notification.objects.create(
-            recipient_student=instance.student,
-            notif_type="Fee",
-            title="Fee Paid",
-            message=f"Your fee of {instance.amount} has been paid.",
+        notify_fee_paid(instance.student_id, instance.amount)
+
+
+def notify_fee_paid(student_id, amount):
+    """
+    Auto-resolve previous fee notifications and add "Fee Paid" in one
+    task. Also called by FeeViewSet.mark_paid, whose queryset update
+    sends no post_save.
+
+    The settle task and this transaction's create_notifications batch are
+    independent tasks, so a worker may run the settle first and the
+    auto-resolve UPDATE would miss the batch's rows. Fee notifications
+    still pending for the student are therefore resolved in the batch
+    itself, before either task is sent. Rows for the fee queued by an
+    earlier request are resolved by create_notifications (via fee_id).
+    """
+    for batch in pending_batches():
+        for fields in batch.notifications:
+            if (fields.get("recipient_student_id") == student_id
+                    and fields["notif_type"] == "Fee" and not fields.get("read")):
+                fields.update(read=True, auto_resolved=True)
+    after_commit(partial(
+        settle_fee_notifications.delay,
+        student_id,
+        dict(
+            recipient_student_id=student_id,
+            **render_notification("fee_paid", amount=amount),
             read=True,
             auto_resolved=True,
-        )
+        ),
+    ))
 
 
 # ============================================================
 # 4. EXAM NOTIFICATIONS
 # ============================================================
-@receiver(post_save, sender=Exam)
-def create_exam_notification(sender, instance, created, **kwargs):
+def create_exam_notification(sender, instance, created, raw=False, **kwargs):
     """
     Notify all students of a program when a new exam is scheduled.
+    The per-student fan-out runs in the worker, sent once the exam commits.
     """
-    if created:
-        students = instance.course.program.students.all()
-        for student in students:
-            Notification.objects.create(
-                recipient_student=student,
-                notif_type="Exam",
-                title="New Exam Scheduled",
-                message=f"The {instance.exam_type} exam for {instance.course.title} "
-                        f"is scheduled on {instance.date}.",
-            )
+    if created and not raw:
+        after_commit(partial(create_exam_notifications.delay, instance.pk))
 
 
 # ============================================================
 # 5. ATTENDANCE NOTIFICATIONS
 # ============================================================
-@receiver(post_save, sender=Attendance)
-def create_attendance_notification(sender, instance, created, **kwargs):
+def create_attendance_notification(sender, instance, created, raw=False, **kwargs):
     """
     Notify students when their attendance is recorded.
     """
-    if created:
-        Notification.objects.create(
-            recipient_student=instance.student,
-            notif_type="Attendance",
-            title="Attendance Recorded",
-            message=f"Your attendance for {instance.course.code} "
-                    f"on {instance.date} has been marked as {instance.status}.",
-        )
+    if created and not raw:
+        queue_notifications(dict(
+            recipient_student_id=instance.student_id,
+            **render_notification(
+                "attendance",
+                course=instance.course.code,
+                date=instance.date,
+                status=instance.status,
+            ),
+        ))
 
 
 # ============================================================
 # 6. GRADE NOTIFICATIONS
 # ============================================================
-@receiver(post_save, sender=Grade)
-def create_grade_notification(sender, instance, created, **kwargs):
+def create_grade_notification(sender, instance, created, raw=False, **kwargs):
     """
     Notify students when a grade is posted.
     """
-    if created:
-        Notification.objects.create(
-            recipient_student=instance.student,
-            notif_type="Grade",
-            title=f"{instance.exam.exam_type} Exam Results",
-            message=f"You scored {instance.obtained_marks} in {instance.exam.course.title}.",
-        )
+    if created and not raw:
+        exam = instance.exam
+        queue_notifications(dict(
+            recipient_student_id=instance.student_id,
+            **render_notification(
+                "grade",
+                exam_type=exam.exam_type,
+                marks=instance.obtained_marks,
+                course=exam.course.title,
+            ),
+        ))
 
 
 # ============================================================
 # 7. STAFF NOTIFICATIONS
 # ============================================================
-@receiver(post_save, sender=Staff)
-def create_staff_notification(sender, instance, created, **kwargs):
+def create_staff_notification(sender, instance, created, raw=False, **kwargs):
     """
     Notify staff on creation or record update.
     """
+    if raw:
+        return
     if created:
-        Notification.objects.create(
-            recipient_staff=instance,
-            notif_type="Staff",
-            title="Welcome to Staff",
-            message=f"Welcome {instance.full_name} to "
-                    f"{instance.department.name if instance.department else 'the institution'}.",
-        )
+        department = instance.department
+        queue_notifications(dict(
+            recipient_staff_id=instance.pk,
+            **render_notification(
+                "staff_welcome",
+                name=instance.full_name,
+                department=department.name if department else "the institution",
+            ),
+        ))
     else:
-        Notification.objects.create(
-            recipient_staff=instance,
-            notif_type="Staff",
-            title="Staff Record Updated",
-            message="Your staff record has been updated.",
-        )
+        notify_staff_updated(instance.pk)
+
+
+def notify_staff_updated(staff_id):
+    """Queue "Staff Record Updated"; also called by StaffViewSet.deactivate."""
+    queue_notifications(dict(recipient_staff_id=staff_id, **render_notification("staff_updated")))
+
+
+# ============================================================
+# 8. DASHBOARD CACHE INVALIDATION
+# ============================================================
+DASHBOARD_VERSION_KEY = "dashboard:version"
+
+
+def dashboard_cache_version():
+    """Token embedded in dashboard cache keys; rotating it orphans every cached result."""
+    return cache.get_or_set(DASHBOARD_VERSION_KEY, lambda: uuid4().hex, None)
+
+
+def invalidate_dashboard_cache(sender, raw=False, **kwargs):
+    """Rotate the dashboard cache version once the write is committed."""
+    if not raw:
+        after_commit(lambda: cache.set(DASHBOARD_VERSION_KEY, uuid4().hex, None))
+
+
+# ============================================================
+# 9. SIGNAL REGISTRATION
+# ============================================================
+NOTIFICATION_HANDLERS = {
+    Admission: create_admission_notification,
+    Enrollment: create_enrollment_notification,
+    Fee: create_fee_notification,
+    Exam: create_exam_notification,
+    Attendance: create_attendance_notification,
+    Grade: create_grade_notification,
+    Staff: create_staff_notification,
+}
+DASHBOARD_MODELS = (Student, Staff, Admission, Enrollment, Attendance, Exam, Grade, Fee, Notification)
+
+
+def dispatch_post_save(sender, **kwargs):
+    """Single post_save receiver: the sender's notification handler, then dashboard invalidation."""
+    handler = NOTIFICATION_HANDLERS.get(sender)
+    if handler is not None:
+        handler(sender, **kwargs)
+    invalidate_dashboard_cache(sender, **kwargs)
+
+
+# Connected per sender, so saves of any other model never reach the dispatcher
+for model in DASHBOARD_MODELS:
+    post_save.connect(dispatch_post_save, sender=model, dispatch_uid=f"post-save-{model.__name__}")
+    post_delete.connect(invalidate_dashboard_cache, sender=model, dispatch_uid=f"post-delete-{model.__name__}")
@@ -0,0 +1,67 @@
+from itertools import islice
+
+from celery import shared_task
+from django.db import transaction
+from .models import Exam, Fee, Notification, Student, render_notification
+
+# Rows per INSERT statement, so a large fan-out stays within parameter limits
+NOTIFICATION_BATCH_SIZE = 500
+
+# ============================================================
+# NOTIFICATION TASKS
+# ============================================================
+@shared_task
+def create_notifications(notifications):
+    """
+    Insert notifications (dicts of Notification field values) in one bulk
+    INSERT. Fee notifications may also carry the `fee_id` they are about;
+    if that fee is already paid, the row is auto-resolved right away.
+    """
+    rows, fee_ids = [], []
+    for fields in notifications:
+        fields = dict(fields)
+        fee_ids.append(fields.pop("fee_id", None))
+        rows.append(Notification(**fields))
+    Notification.objects.bulk_create(rows, batch_size=NOTIFICATION_BATCH_SIZE)
+
+    # A settle task for a payment in a later request may already have run.
+    # Checking only after the rows are committed closes the gap: either
+    # the payment is visible here, or its settle task runs after this insert.
+    if any(fee_ids):
+        paid = set(Fee.objects.filter(pk__in=set(fee_ids) - {None}, is_paid=True).values_list("pk", flat=True))
+        resolved = [row.pk for row, fee_id in zip(rows, fee_ids) if fee_id in paid]
+        if resolved:
+            Notification.objects.filter(pk__in=resolved, read=False).update(read=True, auto_resolved=True)
+
+
+@shared_task
+def settle_fee_notifications(student_id, paid_notification):
+    """
+    Auto-resolve a student's unread fee notifications and record the
+    "Fee Paid" notification in one transaction.
+    """
+    with transaction.atomic():
+        Notification.objects.filter(
+            recipient_student_id=student_id, notif_type="Fee", read=False
+        ).update(read=True, auto_resolved=True)
+        Notification.objects.create(**paid_notification)
+
+
+@shared_task
+def create_exam_notifications(exam_id):
+    """Notify every student of the exam's program that it has been scheduled."""
+    exam = Exam.objects.select_related("course").filter(pk=exam_id).first()
+    if exam is None:
+        return
+    # Rendered once; every student's row shares the same fields
+    fields = render_notification(
+        "exam_scheduled", exam_type=exam.exam_type, course=exam.course.title, date=exam.date
+    )
+    # Stream ids in chunks so a large program never sits in memory at once
+    student_ids = (
+        Student.objects.filter(program_id=exam.course.program_id)
+        .values_list("id", flat=True)
+        .iterator(chunk_size=NOTIFICATION_BATCH_SIZE)
+    )
+    while batch := list(islice(student_ids, NOTIFICATION_BATCH_SIZE)):
+        create_notifications([dict(recipient_student_id=student_id, **fields) for student_id in batch])
@@ -1,3 +1,500 @@
-from django.test import TestCase
+from datetime import date
+from functools import partial
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import ProfileJWTAuthentication
+from .models import Attendance, Course, Department, Enrollment, Fee, Notification, Program, Staff, Student, get_user_role
+from .serializers import CourseSerializer
+from .signals import after_commit, dashboard_cache_version, queue_notifications
+from .tasks import create_notifications
+from .views import DASHBOARD_COUNTS, bulk_update_from_payload, count_querysets, notification_channels
+
+
+def make_student(n=1, program=None):
+    """A saved Student (and its User/Program) with unique values derived from `n`."""
+    if program is None:
+        department = Department.objects.create(name=f"Dept {n}", code=f"D{n}")
+        program = Program.objects.create(
+            program_number=n, name=f"Program {n}", code=f"P{n}",
+            program_type="BS", department=department,
+        )
+    return Student.objects.create(
+        registration_no=f"REG-{n:04d}",
+        user=User.objects.create_user(f"student{n}"),
+        full_name=f"Student {n}",
+        gender="Other",
+        dob=date(2000, 1, 1),
+        email=f"student{n}@example.com",
+        phone=f"0300{n:07d}",
+        address="Address",
+        program=program,
+        enrollment_year=2024,
+    )
+
+
+def make_staff(n=1, user=None):
+    """A saved Staff member (and its User) with unique values derived from `n`."""
+    return Staff.objects.create(
+        user=user or User.objects.create_user(f"staff{n}"),
+        full_name=f"Staff {n}",
+        staff_type="Teaching",
+        email=f"staff{n}@example.com",
+        phone=f"0311{n:07d}",
+    )
+
+
+# ============================================================
+# 1. ON-COMMIT HOOKS
+# ============================================================
+class AfterCommitTests(TransactionTestCase):
+    def test_failing_hook_is_logged_and_later_hooks_still_run(self):
+        ran = []
+
+        def fail():
+            raise ConnectionError("broker down")
+
+        with self.assertLogs("app.signals", level="ERROR") as logs:
+            with transaction.atomic():
+                after_commit(partial(fail))
+                after_commit(lambda: ran.append(True))
+
+        self.assertEqual(ran, [True])
+        self.assertIn("ConnectionError", logs.output[0])
+
+    def test_broker_failure_still_rotates_dashboard_cache(self):
+        version = dashboard_cache_version()
+        with mock.patch.object(create_notifications, "delay", side_effect=ConnectionError), \
+                self.assertLogs("app.signals", level="ERROR"):
+            with transaction.atomic():
+                make_staff()
+
+        self.assertNotEqual(dashboard_cache_version(), version)
+
+    def test_failing_hook_outside_transaction_is_logged(self):
+        with self.assertLogs("app.signals", level="ERROR"):
+            after_commit(partial(int, "not a number"))
+
+
+class QueueNotificationsTests(TransactionTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(create_notifications, "delay")
+        self.delay = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sent(self):
+        return [call.args[0] for call in self.delay.call_args_list]
+
+    def test_autocommit_sends_immediately(self):
+        queue_notifications({"title": "a"})
+
+        self.assertEqual(self.sent(), [[{"title": "a"}]])
+
+    def test_one_task_per_transaction(self):
+        with transaction.atomic():
+            queue_notifications({"title": "a"})
+            queue_notifications({"title": "b"}, {"title": "c"})
+            self.assertEqual(self.sent(), [])
+
+        self.assertEqual(self.sent(), [[{"title": "a"}, {"title": "b"}, {"title": "c"}]])
+
+    def test_outer_rollback_sends_nothing(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                queue_notifications({"title": "a"})
+                raise RuntimeError
+
+        self.assertEqual(self.sent(), [])
+
+    def test_savepoint_rollback_keeps_outer_notifications(self):
+        with transaction.atomic():
+            queue_notifications({"title": "outer"})
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    queue_notifications({"title": "inner"})
+                    raise RuntimeError
+            queue_notifications({"title": "after"})
+
+        self.assertEqual(self.sent(), [[{"title": "outer"}, {"title": "after"}]])
+
+    def test_committed_savepoint_is_sent_with_the_transaction(self):
+        with transaction.atomic():
+            queue_notifications({"title": "outer"})
+            with transaction.atomic():
+                queue_notifications({"title": "inner"})
+
+        self.assertEqual(
+            sorted(n["title"] for batch in self.sent() for n in batch), ["inner", "outer"]
+        )
+
+    def test_signal_saves_in_one_transaction_insert_once(self):
+        self.delay.side_effect = create_notifications
+        with transaction.atomic():
+            make_staff(1)
+            make_staff(2)
+
+        self.assertEqual(self.delay.call_count, 1)
+        self.assertEqual(Notification.objects.filter(title="Welcome to Staff").count(), 2)
+
+
+# ============================================================
+# 2. FEE NOTIFICATIONS
+# ============================================================
+class FeePaidTests(TransactionTestCase):
+    def test_settle_before_batch_still_resolves_same_transaction_fee_rows(self):
+        student = make_student()
+        sent_batches = []
+        # A second worker picks up the settle task before the batch task
+        with mock.patch.object(create_notifications, "delay", side_effect=sent_batches.append):
+            with transaction.atomic():
+                fee = Fee.objects.create(student=student, amount=100, due_date=date(2030, 1, 1))
+                fee.is_paid = True
+                fee.save()
+        for notifications in sent_batches:
+            create_notifications(notifications)
+
+        self.assertEqual(
+            set(Notification.objects.filter(recipient_student=student).values_list("title", "read", "auto_resolved")),
+            {("New Fee Assigned", True, True), ("Fee Paid", True, True)},
+        )
+
+    def test_settle_from_a_later_request_before_the_insert_still_resolves(self):
+        student = make_student()
+        sent_batches = []
+        with mock.patch.object(create_notifications, "delay", side_effect=sent_batches.append):
+            fee = Fee.objects.create(student=student, amount=100, due_date=date(2030, 1, 1))
+        # Paid in a later request; its settle task runs before the insert above
+        fee.is_paid = True
+        fee.save()
+        for notifications in sent_batches:
+            create_notifications(notifications)
+
+        self.assertFalse(Notification.objects.filter(recipient_student=student, read=False).exists())
+        self.assertTrue(
+            Notification.objects.filter(title="New Fee Assigned", read=True, auto_resolved=True).exists()
+        )
+
+    def test_insert_leaves_unpaid_fee_rows_unread(self):
+        student = make_student()
+        Fee.objects.create(student=student, amount=100, due_date=date(2030, 1, 1))
+
+        self.assertTrue(
+            Notification.objects.filter(recipient_student=student, title="New Fee Assigned", read=False).exists()
+        )
+
+    def test_fee_rows_queued_after_payment_stay_unread(self):
+        student = make_student()
+        with transaction.atomic():
+            fee = Fee.objects.create(student=student, amount=100, due_date=date(2000, 1, 1), is_paid=True)
+            fee.save()  # an update of a paid fee settles it
+            Fee.objects.create(student=student, amount=50, due_date=date(2030, 1, 1))
+
+        self.assertTrue(
+            Notification.objects.filter(recipient_student=student, title="New Fee Assigned", read=False).exists()
+        )
+
+
+# ============================================================
+# 3. NOTIFICATION STREAM
+# ============================================================
+class NotificationStreamTests(TestCase):
+    def test_channels_cover_student_and_staff_records(self):
+        student = make_student()
+        staff = make_staff(user=student.user)
+
+        self.assertEqual(
+            notification_channels(student.user),
+            [f"notif_student_{student.pk}", f"notif_staff_{staff.pk}"],
+        )
+
+    def test_stream_requires_postgresql(self):
+        client = APIClient()
+        client.force_authenticate(make_student().user)
+
+        response = client.get("/api/notifications/stream/")
+
+        self.assertEqual(response.status_code, 501)
+
+
+# ============================================================
+# 4. BULK UPDATE
+# ============================================================
+class BulkUpdateFromPayloadTests(TestCase):
+    def setUp(self):
+        program = make_student().program
+        self.courses = [
+            Course.objects.create(code=f"C{i}", title=f"Course {i}", credit_hours=3, semester=1, program=program)
+            for i in range(5)
+        ]
+        self.context = {"request": APIRequestFactory().put("/api/courses/bulk/")}
+
+    def update(self, items):
+        return bulk_update_from_payload(
+            CourseSerializer,
+            Course.objects.select_related("program__department").prefetch_related("program__courses"),
+            items,
+            self.context,
+        )
+
+    def test_query_count_does_not_grow_with_items(self):
+        # SELECT rows, prefetch program courses, one bulk UPDATE
+        for count in (1, 5):
+            with self.assertNumQueries(3):
+                self.update([{"id": course.pk, "title": f"New {count}"} for course in self.courses[:count]])
+
+        self.assertEqual(set(Course.objects.values_list("title", flat=True)), {"New 5"})
+
+    def test_skips_missing_unknown_and_invalid_items(self):
+        first, second = self.courses[:2]
+
+        data = self.update([
+            {"title": "No id"},
+            {"id": 999999, "title": "Unknown"},
+            {"id": first.pk, "semester": "not a number"},
+            {"id": second.pk, "title": "Updated"},
+        ])
+
+        self.assertEqual([row["title"] for row in data], ["Updated"])
+        first.refresh_from_db()
+        self.assertEqual(first.semester, 1)
+        self.assertEqual(Course.objects.get(pk=second.pk).title, "Updated")
+
+    def test_no_valid_items_runs_no_update(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(self.update([{"id": self.courses[0].pk, "semester": "x"}]), [])
+
+
+# ============================================================
+# 5. DASHBOARD COUNTS
+# ============================================================
+class CountQuerysetsTests(TestCase):
+    def test_counts_every_queryset_in_one_query(self):
+        make_student(1)
+        make_student(2)
+        make_staff()
+
+        with self.assertNumQueries(1):
+            counts = count_querysets({
+                "students": Student.objects.all(),
+                "named": Student.objects.filter(full_name="Student 2"),
+                "staff": Staff.objects.all(),
+                "fees": Fee.objects.all(),
+            })
+
+        self.assertEqual(counts, {"students": 2, "named": 1, "staff": 1, "fees": 0})
+
+    def test_dashboard_counts_cost_one_query(self):
+        cache.clear()
+        make_student()
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser("admin"))
+
+        # One COUNT round-trip for all nine models (the profile is already cached on the user)
+        with self.assertNumQueries(1):
+            response = client.get("/api/dashboard/", {"filter": "today"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(DASHBOARD_COUNTS) | {"filter_info"}, set(response.data))
+        self.assertEqual(response.data["total_students"], 1)
+
+
+# ============================================================
+# 6. ROLES
+# ============================================================
+class UserRoleTests(TestCase):
+    def test_role_is_looked_up_once_per_user_instance(self):
+        User.objects.create_superuser("admin")
+        user = User.objects.get(username="admin")  # as simplejwt loads it, profile not joined
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_user_role(user), "Admin")
+            self.assertEqual(get_user_role(user), "Admin")
+
+    def test_jwt_user_and_role_load_in_one_query(self):
+        token = AccessToken.for_user(User.objects.create_superuser("admin"))
+
+        with self.assertNumQueries(1):
+            user = ProfileJWTAuthentication().get_user(token)
+            self.assertEqual(get_user_role(user), "Admin")
+
+    def test_jwt_request_checks_role_without_a_profile_query(self):
+        token = AccessToken.for_user(User.objects.create_superuser("admin"))
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        cache.clear()
+
+        # user+profile JOIN, then the dashboard's single COUNT query
+        with self.assertNumQueries(2):
+            self.assertEqual(client.get("/api/dashboard/").status_code, 200)
+
+
+# ============================================================
+# 7. CURSOR PAGINATION
+# ============================================================
+class AttendanceCursorTests(TestCase):
+    def test_next_link_works_for_every_ordering(self):
+        students = [make_student(1)]
+        students.append(make_student(2, program=students[0].program))
+        course = Course.objects.create(
+            code="C1", title="Course 1", credit_hours=3, semester=1, program=students[0].program
+        )
+        for day in range(1, 4):
+            for student in students:
+                Attendance.objects.create(student=student, course=course, date=date(2025, 1, day), status="Present")
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser("admin"))
+
+        for ordering in ("date", "-date", "student_id", "-student_id"):
+            with self.subTest(ordering=ordering):
+                ids, url = [], f"/api/attendance/?ordering={ordering}&page_size=4"
+                while url:
+                    response = client.get(url)
+                    self.assertEqual(response.status_code, 200)
+                    ids += [row["id"] for row in response.data["results"]]
+                    url = response.data["next"]
+                self.assertCountEqual(ids, Attendance.objects.values_list("id", flat=True))
+
+
+# ============================================================
+# 8. ADMIN
+# ============================================================
+class NotificationPollTests(TestCase):
+    url = "/admin/app/notification/poll/"
+
+    def setUp(self):
+        self.user = User.objects.create_user("clerk", is_staff=True)
+        self.client.force_login(self.user)
+
+    def test_staff_without_view_permission_is_denied(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_view_permission_allows_polling(self):
+        self.user.user_permissions.add(Permission.objects.get(codename="view_notification"))
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()), {"latest_id", "unread_count"})
+
+
+# ============================================================
+# 9. DEPARTMENTS & PROGRAMS
+# ============================================================
+class DepartmentSerializerTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser("admin"))
+
+    def test_programs_count_on_list_create_and_update(self):
+        program = make_student().program
+
+        self.assertEqual(self.client.get("/api/departments/").data["results"][0]["programs_count"], 1)
+        created = self.client.post("/api/departments/", {"name": "New", "code": "NEW"})
+        self.assertEqual(created.status_code, 201)
+        self.assertEqual(created.data["programs_count"], 0)
+        updated = self.client.patch(f"/api/departments/{program.department_id}/", {"name": "Renamed"})
+        self.assertEqual(updated.data["programs_count"], 1)
+
+    def test_nested_department_has_no_programs_count(self):
+        program = make_student().program
+
+        department = self.client.get(f"/api/programs/{program.pk}/").data["department"]
+
+        self.assertEqual(set(department), {"id", "name", "code", "description", "hod"})
+
+
+# ============================================================
+# 10. DETAIL ACTIONS
+# ============================================================
+class DeactivateStaffTests(TransactionTestCase):
+    def test_notifies_with_integer_staff_id(self):
+        staff = make_staff()
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser("admin"))
+
+        with mock.patch.object(create_notifications, "delay") as delay:
+            response = client.post(f"/api/staff/{staff.pk}/deactivate/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Staff.objects.get(pk=staff.pk).is_active)
+        (notification,), = delay.call_args.args
+        self.assertEqual(notification["recipient_staff_id"], staff.pk)
+        self.assertIsInstance(notification["recipient_staff_id"], int)
+
+    def test_unknown_or_malformed_pk_is_404(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser("admin"))
+
+        for pk in ("999999", "abc"):
+            with self.subTest(pk=pk):
+                self.assertEqual(client.post(f"/api/staff/{pk}/deactivate/").status_code, 404)
+
+
+# ============================================================
+# 11. UNIQUE CONSTRAINTS
+# ============================================================
+class DatabaseUniqueTests(TestCase):
+    def setUp(self):
+        self.student = make_student()
+        self.course = Course.objects.create(
+            code="C1", title="Course 1", credit_hours=3, semester=1, program=self.student.program
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser("admin"))
+
+    def assertDuplicateRejected(self, method, url, payload):
+        response = getattr(self.client, method)(url, payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("non_field_errors", response.data)
+
+    def test_duplicate_enrollment_is_400(self):
+        payload = dict(student_id=self.student.pk, course_id=self.course.pk, semester=1, year=2025)
+        self.assertEqual(self.client.post("/api/enrollments/", payload, format="json").status_code, 201)
+
+        self.assertDuplicateRejected("post", "/api/enrollments/", payload)
+        self.assertEqual(Enrollment.objects.count(), 1)
+
+    def test_duplicate_attendance_is_400(self):
+        payload = dict(student_id=self.student.pk, course_id=self.course.pk, date="2025-01-01", status="Present")
+        self.assertEqual(self.client.post("/api/attendance/", payload, format="json").status_code, 201)
+
+        self.assertDuplicateRejected("post", "/api/attendance/", payload)
+        self.assertEqual(Attendance.objects.count(), 1)
+
+    def test_update_onto_existing_attendance_is_400(self):
+        Attendance.objects.create(student=self.student, course=self.course, date=date(2025, 1, 1), status="Present")
+        other = Attendance.objects.create(student=self.student, course=self.course, date=date(2025, 1, 2), status="Absent")
+
+        self.assertDuplicateRejected("patch", f"/api/attendance/{other.pk}/", {"date": "2025-01-01"})
+        other.refresh_from_db()
+        self.assertEqual(other.date, date(2025, 1, 2))
+
+
+# ============================================================
+# 12. STUDENT AGE
+# ============================================================
+class StudentAgeTests(TestCase):
+    CASES = [
+        # (today, dob, age)
+        (date(2025, 6, 14), date(2000, 6, 15), 24),  # day before the birthday
+        (date(2025, 6, 15), date(2000, 6, 15), 25),  # on the birthday
+        (date(2025, 2, 28), date(2000, 2, 29), 24),  # leap-day dob, non-leap year
+        (date(2025, 3, 1), date(2000, 2, 29), 25),
+        (date(2024, 2, 29), date(2000, 2, 29), 24),
+    ]
+
+    def test_sql_annotation_matches_python_property(self):
+        student = make_student()
+        for today, dob, age in self.CASES:
+            with self.subTest(today=today, dob=dob):
+                Student.objects.filter(pk=student.pk).update(dob=dob)
+                fixed_date = type("FixedDate", (date,), {"today": classmethod(lambda cls: today)})
+                with mock.patch("app.models.date", fixed_date):
+                    self.assertEqual(Student.objects.get(pk=student.pk).age, age)
+                    self.assertEqual(Student.objects.with_age().get(pk=student.pk).age, age)
@@ -18,12 +18,12 @@ router.register(r'fees', views.FeeViewSet)
 router.register(r'notifications', views.NotificationViewSet)
 
 urlpatterns = [
-    path('', include(router.urls)),
-
-    # Bulk APIs
+    # Bulk APIs (before the router, whose <pk> detail routes would match "bulk")
     path('students/bulk/', views.StudentBulkAPIView.as_view(), name='student-bulk'),
     path('courses/bulk/', views.CourseBulkAPIView.as_view(), name='course-bulk'),
 
+    path('', include(router.urls)),
+
     # Dashboard
     path('dashboard/', views.DashboardAPIView.as_view(), name='dashboard'),
 ]
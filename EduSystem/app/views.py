@@ -3,22 +3,29 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
-from django.utils.timezone import now
+from django.utils.timezone import localdate, make_aware
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.pagination import PageNumberPagination
-from datetime import date, timedelta
-from django.db import transaction
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from datetime import date, datetime, time, timedelta
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection, transaction
+from django.db.models import Count
+from django.http import Http404, StreamingHttpResponse
 
 from .models import (
     Department, Program, Course, Designation,
     Student, Staff, Admission, Enrollment,
     Attendance, Exam, Grade, Fee, Notification,
-    RoleBasedPermission
+    RoleBasedPermission, get_user_role
 )
+from .signals import dashboard_cache_version, notify_fee_paid, notify_staff_updated
 from .serializers import (
-    DepartmentSerializer, ProgramSerializer, CourseSerializer, DesignationSerializer,
+    DepartmentSerializer, ProgramSerializer, ProgramListSerializer, CourseSerializer, DesignationSerializer,
     StudentSerializer, StaffSerializer, AdmissionSerializer, EnrollmentSerializer,
-    AttendanceSerializer, ExamSerializer, GradeSerializer, FeeSerializer, NotificationSerializer
+    AttendanceSerializer, ExamSerializer, GradeSerializer, FeeSerializer, NotificationSerializer,
+    NotificationListSerializer
 )
 
 
@@ -31,9 +38,47 @@ class StandardResultsSetPagination(PageNumberPagination):
     max_page_size = 100
 
 
+class FastCursorPagination(CursorPagination):
+    """Keyset pagination for high-volume lists: no COUNT(*), just next/previous cursors."""
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = "-id"
+
+
 # ============================================================
 # 2. Dashboard API
 # ============================================================
+DASHBOARD_COUNTS = {
+    "total_students": Student,
+    "total_staff": Staff,
+    "total_admissions": Admission,
+    "total_enrollments": Enrollment,
+    "total_attendance": Attendance,
+    "total_exams": Exam,
+    "total_grades": Grade,
+    "total_fees": Fee,
+    "total_notifications": Notification,
+}
+DASHBOARD_CACHE_TIMEOUT = 30
+
+
+def count_querysets(querysets):
+    """
+    COUNT several querysets in one round-trip: each becomes a scalar
+    subquery of a single SELECT. Returns {key: count} in input order.
+    """
+    parts, params = [], []
+    for i, queryset in enumerate(querysets.values()):
+        sql, sql_params = queryset.order_by().values("pk").query.sql_with_params()
+        parts.append(f"(SELECT COUNT(*) FROM ({sql}) AS q{i})")
+        params.extend(sql_params)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(parts)}", params)
+        row = cursor.fetchone()
+    return dict(zip(querysets, row))
+
+
 class DashboardAPIView(APIView):
     """
     Admin & Staff Dashboard for overall statistics.
@@ -47,18 +92,16 @@ class DashboardAPIView(APIView):
         start_date = request.query_params.get("start")
         end_date = request.query_params.get("end")
         start = end = None
+        today = localdate()
+        tomorrow = today + timedelta(days=1)
 
         if filter_type == "today":
-            start = now().date()
-            end = start + timedelta(days=1)
+            start, end = today, tomorrow
         elif filter_type == "week":
-            start = now().date() - timedelta(days=7)
-            end = now().date() + timedelta(days=1)
+            start, end = today - timedelta(days=7), tomorrow
         elif filter_type == "month":
-            start = now().replace(day=1).date()
-            end = now().date() + timedelta(days=1)
+            start, end = today.replace(day=1), tomorrow
         elif filter_type == "custom" and start_date and end_date:
-            from datetime import datetime
             try:
                 start = datetime.strptime(start_date, "%Y-%m-%d").date()
                 end = datetime.strptime(end_date, "%Y-%m-%d").date() + timedelta(days=1)
@@ -66,26 +109,29 @@ class DashboardAPIView(APIView):
                 return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=400)
 
         def date_filter(model):
+            # Half-open [start, end) between local midnights, so created_at
+            # is compared to aware datetimes and its index bounds the scan
             if hasattr(model, "created_at") and start and end:
-                return model.objects.filter(created_at__range=[start, end])
+                return model.objects.filter(
+                    created_at__gte=make_aware(datetime.combine(start, time.min)),
+                    created_at__lt=make_aware(datetime.combine(end, time.min)),
+                )
             return model.objects.all()
 
-        data = {
-            "total_students": date_filter(Student).count(),
-            "total_staff": date_filter(Staff).count(),
-            "total_admissions": date_filter(Admission).count(),
-            "total_enrollments": date_filter(Enrollment).count(),
-            "total_attendance": date_filter(Attendance).count(),
-            "total_exams": date_filter(Exam).count(),
-            "total_grades": date_filter(Grade).count(),
-            "total_fees": date_filter(Fee).count(),
-            "total_notifications": date_filter(Notification).count(),
+        # Counts are the same for every allowed role, so the key is just the window
+        cache_key = f"dashboard:{dashboard_cache_version()}:{start}:{end}"
+        data = cache.get_or_set(
+            cache_key,
+            lambda: count_querysets({key: date_filter(model) for key, model in DASHBOARD_COUNTS.items()}),
+            DASHBOARD_CACHE_TIMEOUT,
+        )
+        data.update({
             "filter_info": {
                 "filter_type": filter_type or "all",
                 "start_date": str(start) if start else None,
                 "end_date": str(end) if end else None,
             },
-        }
+        })
         return Response(data, status=status.HTTP_200_OK)
 
 
@@ -93,7 +139,7 @@ class DashboardAPIView(APIView):
 # 3. Department, Designation, Program, Course ViewSets
 # ============================================================
 class DepartmentViewSet(viewsets.ModelViewSet):
-    queryset = Department.objects.all()
+    queryset = Department.objects.annotate(programs_count=Count("programs"))
     serializer_class = DepartmentSerializer
     permission_classes = [IsAuthenticated, RoleBasedPermission]
     allowed_roles = ["Admin", "Staff"]
@@ -117,7 +163,7 @@ class DesignationViewSet(viewsets.ModelViewSet):
 
 
 class ProgramViewSet(viewsets.ModelViewSet):
-    queryset = Program.objects.all().order_by("program_number")
+    queryset = Program.objects.select_related("department").order_by("program_number")
     serializer_class = ProgramSerializer
     permission_classes = [IsAuthenticated, RoleBasedPermission]
     allowed_roles = ["Admin", "Staff"]
@@ -127,9 +173,24 @@ class ProgramViewSet(viewsets.ModelViewSet):
     ordering_fields = ["name", "program_number"]
     pagination_class = StandardResultsSetPagination
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            return queryset
+        return queryset.prefetch_related("courses")
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return ProgramListSerializer
+        return super().get_serializer_class()
+
 
 class CourseViewSet(viewsets.ModelViewSet):
-    queryset = Course.objects.all().order_by("code")
+    queryset = (
+        Course.objects.select_related("program__department")
+        .prefetch_related("program__courses")
+        .order_by("code")
+    )
     serializer_class = CourseSerializer
     permission_classes = [IsAuthenticated, RoleBasedPermission]
     allowed_roles = ["Admin", "Staff"]
@@ -143,36 +204,51 @@ class CourseViewSet(viewsets.ModelViewSet):
 # ============================================================
 # 4. Student & Staff ViewSets
 # ============================================================
+def detail_queryset(viewset, pk):
+    """
+    The viewset's queryset narrowed to `pk`, for detail actions that write
+    with a single UPDATE instead of get_object() + save(). Malformed pks
+    raise Http404, as get_object() would.
+    """
+    try:
+        return viewset.get_queryset().filter(pk=pk)
+    except (TypeError, ValueError, ValidationError):
+        raise Http404
+
+
 class StudentViewSet(viewsets.ModelViewSet):
-    queryset = Student.objects.all().order_by("-id")
+    queryset = (
+        Student.objects.select_related("user", "program__department")
+        .prefetch_related("program__courses")
+        .order_by("-id")
+    )
     serializer_class = StudentSerializer
     permission_classes = [IsAuthenticated, RoleBasedPermission]
     allowed_roles = ["Admin", "Staff", "Student"]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ["program", "is_active", "enrollment_year"]
     search_fields = ["full_name", "registration_no", "email"]
-    ordering_fields = ["full_name", "enrollment_year", "id"]
+    ordering_fields = ["full_name", "enrollment_year", "age", "id"]
     pagination_class = StandardResultsSetPagination
 
     def get_queryset(self):
         user = self.request.user
-        role = getattr(user.profile, "role", None)
+        role = get_user_role(user)
+        # Annotated per request: with_age() bakes in today's date
+        queryset = super().get_queryset().with_age()
         if role == "Student":
-            return Student.objects.filter(user=user)
-        elif role == "Staff":
-            return Student.objects.all()
-        return super().get_queryset()
+            return queryset.filter(user=user)
+        return queryset
 
     @action(detail=True, methods=["post"])
     def deactivate(self, request, pk=None):
-        student = self.get_object()
-        student.is_active = False
-        student.save()
+        if not detail_queryset(self, pk).update(is_active=False):
+            raise Http404
         return Response({"status": "Student deactivated"})
 
 
 class StaffViewSet(viewsets.ModelViewSet):
-    queryset = Staff.objects.all()
+    queryset = Staff.objects.select_related("user", "designation", "department")
     serializer_class = StaffSerializer
     permission_classes = [IsAuthenticated, RoleBasedPermission]
     allowed_roles = ["Admin"]
@@ -184,9 +260,10 @@ class StaffViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=["post"])
     def deactivate(self, request, pk=None):
-        staff = self.get_object()
-        staff.is_active = False
-        staff.save()
+        if not detail_queryset(self, pk).update(is_active=False):
+            raise Http404
+        # update() sends no post_save, so notify as a saved record would
+        notify_staff_updated(int(pk))
         return Response({"status": "Staff deactivated"})
 
 
@@ -194,7 +271,9 @@ class StaffViewSet(viewsets.ModelViewSet):
 # 5. Admission, Enrollment, Attendance, Exam, Grade, Fee, Notification
 # ============================================================
 class AdmissionViewSet(viewsets.ModelViewSet):
-    queryset = Admission.objects.all()
+    queryset = Admission.objects.select_related(
+        "student__user", "student__program__department", "program__department"
+    ).prefetch_related("student__program__courses", "program__courses")
     serializer_class = AdmissionSerializer
     permission_classes = [IsAuthenticated, RoleBasedPermission]
     allowed_roles = ["Admin", "Staff"]
@@ -206,7 +285,14 @@ class AdmissionViewSet(viewsets.ModelViewSet):
 
 
 class EnrollmentViewSet(viewsets.ModelViewSet):
-    queryset = Enrollment.objects.all()
+    queryset = (
+        Enrollment.objects.select_related("student__user", "student__program__department", "course")
+        .prefetch_related("student__program__courses")
+        .only(
+            "id", "student", "semester", "year", "date_enrolled",
+            "course__id", "course__code", "course__title",
+        )
+    )
     serializer_class = EnrollmentSerializer
     permission_classes = [IsAuthenticated, RoleBasedPermission]
     allowed_roles = ["Admin", "Staff", "Student"]
@@ -218,19 +304,28 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
 
 
 class AttendanceViewSet(viewsets.ModelViewSet):
-    queryset = Attendance.objects.all()
+    queryset = (
+        Attendance.objects.select_related("student__user", "student__program__department", "course")
+        .prefetch_related("student__program__courses")
+        .only(
+            "id", "student", "date", "status",
+            "course__id", "course__code", "course__title",
+        )
+    )
     serializer_class = AttendanceSerializer
     permission_classes = [IsAuthenticated, RoleBasedPermission]
     allowed_roles = ["Admin", "Staff"]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ["student", "course", "date", "status"]
     search_fields = ["student__full_name", "course__title"]
-    ordering_fields = ["date", "student"]
-    pagination_class = StandardResultsSetPagination
+    ordering_fields = ["date", "student_id"]  # cursor positions need plain column values
+    pagination_class = FastCursorPagination
 
 
 class ExamViewSet(viewsets.ModelViewSet):
-    queryset = Exam.objects.all()
+    queryset = Exam.objects.select_related("course__program__department").prefetch_related(
+        "course__program__courses"
+    )
     serializer_class = ExamSerializer
     permission_classes = [IsAuthenticated, RoleBasedPermission]
     allowed_roles = ["Admin", "Staff"]
@@ -242,7 +337,9 @@ class ExamViewSet(viewsets.ModelViewSet):
 
 
 class GradeViewSet(viewsets.ModelViewSet):
-    queryset = Grade.objects.all()
+    queryset = Grade.objects.select_related(
+        "student__user", "student__program__department", "exam__course__program__department"
+    ).prefetch_related("student__program__courses", "exam__course__program__courses")
     serializer_class = GradeSerializer
     permission_classes = [IsAuthenticated, RoleBasedPermission]
     allowed_roles = ["Admin", "Staff", "Student"]
@@ -250,11 +347,13 @@ class GradeViewSet(viewsets.ModelViewSet):
     filterset_fields = ["student", "exam"]
     search_fields = ["student__full_name", "exam__course__title"]
     ordering_fields = ["id"]
-    pagination_class = StandardResultsSetPagination
+    pagination_class = FastCursorPagination
 
 
 class FeeViewSet(viewsets.ModelViewSet):
-    queryset = Fee.objects.all()
+    queryset = Fee.objects.select_related("student__user", "student__program__department").prefetch_related(
+        "student__program__courses"
+    )
     serializer_class = FeeSerializer
     permission_classes = [IsAuthenticated, RoleBasedPermission]
     allowed_roles = ["Admin", "Staff", "Student"]
@@ -266,15 +365,77 @@ class FeeViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=["post"])
     def mark_paid(self, request, pk=None):
-        fee = self.get_object()
-        fee.is_paid = True
-        fee.payment_date = date.today()
-        fee.save()
+        queryset = detail_queryset(self, pk)
+        # Only the two columns the "Fee Paid" notification needs
+        fee = queryset.values("student_id", "amount").first()
+        if fee is None:
+            raise Http404
+        queryset.update(is_paid=True, payment_date=date.today())
+        # update() sends no post_save, so settle fee notifications explicitly
+        notify_fee_paid(fee["student_id"], fee["amount"])
         return Response({"status": "Fee marked as paid"})
 
 
+NOTIFICATION_STREAM_KEEPALIVE = 15
+
+
+def notification_channels(user):
+    """LISTEN channels the app_notification insert trigger notifies for this user's records."""
+    channels = [
+        f"notif_student_{pk}" for pk in Student.objects.filter(user=user).values_list("pk", flat=True)
+    ]
+    channels += [
+        f"notif_staff_{pk}" for pk in Staff.objects.filter(user=user).values_list("pk", flat=True)
+    ]
+    return channels
+
+
+def listen_connection_params():
+    """
+    psycopg connect() kwargs for a dedicated LISTEN connection to the default
+    database, built by Django so OPTIONS (sslmode, ...) carry over. Pooled
+    connections cannot stay in LISTEN, so the stream never borrows one.
+    """
+    params = connection.get_connection_params()
+    params.pop("cursor_factory", None)  # Django's sync cursor; the defaults suit both APIs
+    return {**params, "autocommit": True}
+
+
+def listen_notifications(channels, params):
+    """
+    Yield server-sent events for NOTIFY payloads on `channels`, with a
+    keepalive comment every NOTIFICATION_STREAM_KEEPALIVE seconds.
+    Holds a worker thread for as long as the client stays connected (WSGI).
+    """
+    import psycopg  # only needed (and installed) on PostgreSQL
+    from psycopg import sql
+
+    with psycopg.connect(**params) as conn:
+        for channel in channels:
+            conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(channel)))
+        while True:
+            for notify in conn.notifies(timeout=NOTIFICATION_STREAM_KEEPALIVE):
+                yield f"event: notification\ndata: {notify.payload}\n\n"
+            yield ": keepalive\n\n"
+
+
+async def alisten_notifications(channels, params):
+    """listen_notifications for ASGI: waits on the event loop instead of a thread."""
+    import psycopg
+    from psycopg import sql
+
+    async with await psycopg.AsyncConnection.connect(**params) as conn:
+        for channel in channels:
+            await conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(channel)))
+        while True:
+            async for notify in conn.notifies(timeout=NOTIFICATION_STREAM_KEEPALIVE):
+                yield f"event: notification\ndata: {notify.payload}\n\n"
+            yield ": keepalive\n\n"
+
+
 class NotificationViewSet(viewsets.ModelViewSet):
-    queryset = Notification.objects.all().order_by("-created_at")
+    # Same order as -created_at (auto_now_add), read straight off the PK
+    queryset = Notification.objects.order_by("-id")
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated, RoleBasedPermission]
     allowed_roles = ["Admin", "Staff", "Student"]
@@ -282,24 +443,96 @@ class NotificationViewSet(viewsets.ModelViewSet):
     filterset_fields = ["recipient_student", "recipient_staff", "notif_type", "read"]
     search_fields = ["title", "message"]
     ordering_fields = ["created_at"]
-    pagination_class = StandardResultsSetPagination
+    pagination_class = FastCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            # List rows skip the message TEXT column and the recipient joins
+            return queryset.only(
+                "id", "recipient_student", "recipient_staff",
+                "notif_type", "title", "created_at", "read", "auto_resolved",
+            )
+        return queryset.select_related(
+            "recipient_student__user", "recipient_student__program__department",
+            "recipient_staff__user", "recipient_staff__designation", "recipient_staff__department",
+        ).prefetch_related("recipient_student__program__courses")
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return NotificationListSerializer
+        return super().get_serializer_class()
+
+    @action(detail=False, methods=["get"])
+    def stream(self, request):
+        """Push the caller's new notifications as server-sent events instead of polling the list."""
+        if connection.vendor != "postgresql":
+            return Response(
+                {"error": "Notification streaming requires PostgreSQL."},
+                status=status.HTTP_501_NOT_IMPLEMENTED,
+            )
+        channels = notification_channels(request.user)
+        if not channels:
+            return Response(
+                {"error": "No student or staff record for this user."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        params = listen_connection_params()
+        # The stream outlives the request, and request_finished (which would
+        # release Django's pooled connection) only fires once it closes
+        connection.close()
+        # Django streams only async iterators under ASGI and only sync ones under WSGI
+        listen = alisten_notifications if isinstance(request._request, ASGIRequest) else listen_notifications
+        response = StreamingHttpResponse(listen(channels, params), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
 
     @action(detail=True, methods=["post"])
     def mark_read(self, request, pk=None):
-        notification = self.get_object()
-        notification.read = True
-        notification.save()
+        if not detail_queryset(self, pk).update(read=True):
+            raise Http404
         return Response({"status": "Notification marked as read"})
 
 
 # ============================================================
 # 6. Bulk Create / Update Students & Courses
 # ============================================================
+BULK_BATCH_SIZE = 500
+
+
+def bulk_update_from_payload(serializer_class, queryset, items, context):
+    """
+    Apply partial updates for a list of `{"id": ..., ...}` items with one
+    SELECT and one bulk_update instead of a get() + save() per row.
+    Items without an id, with an unknown id or failing validation are
+    skipped. Returns the serialized updated rows.
+    """
+    items = [item for item in items if item.get("id")]
+    instances = {str(obj.pk): obj for obj in queryset.filter(pk__in=[item["id"] for item in items])}
+    to_update, fields, serializers = [], set(), []
+    for item in items:
+        instance = instances.get(str(item["id"]))
+        if instance is None:
+            continue
+        serializer = serializer_class(instance, data=item, partial=True, context=context)
+        if not serializer.is_valid():
+            continue
+        for attr, value in serializer.validated_data.items():
+            setattr(instance, attr, value)
+        fields.update(serializer.validated_data)
+        to_update.append(instance)
+        serializers.append(serializer)
+    if fields:
+        queryset.model.objects.bulk_update(to_update, fields, batch_size=BULK_BATCH_SIZE)
+    return [serializer.data for serializer in serializers]
+
+
 class StudentBulkAPIView(APIView):
     @transaction.atomic
     def post(self, request):
         """Bulk Create Students"""
-        serializer = StudentSerializer(data=request.data, many=True)
+        serializer = StudentSerializer(data=request.data, many=True, context={"request": request})
         if serializer.is_valid():
             serializer.save()
             return Response({"message": "Students created successfully", "data": serializer.data}, status=status.HTTP_201_CREATED)
@@ -308,19 +541,12 @@ class StudentBulkAPIView(APIView):
     @transaction.atomic
     def put(self, request):
         """Bulk Update Students"""
-        updated = []
-        for item in request.data:
-            student_id = item.get("id")
-            if not student_id:
-                continue
-            try:
-                student = Student.objects.get(id=student_id)
-                serializer = StudentSerializer(student, data=item, partial=True)
-                if serializer.is_valid():
-                    serializer.save()
-                    updated.append(serializer.data)
-            except Student.DoesNotExist:
-                continue
+        updated = bulk_update_from_payload(
+            StudentSerializer,
+            Student.objects.select_related("user", "program__department").prefetch_related("program__courses"),
+            request.data,
+            {"request": request},
+        )
         return Response({"message": "Students updated successfully", "data": updated}, status=status.HTTP_200_OK)
 
 
@@ -328,7 +554,7 @@ class CourseBulkAPIView(APIView):
     @transaction.atomic
     def post(self, request):
         """Bulk Create Courses"""
-        serializer = CourseSerializer(data=request.data, many=True)
+        serializer = CourseSerializer(data=request.data, many=True, context={"request": request})
         if serializer.is_valid():
             serializer.save()
             return Response({"message": "Courses created successfully", "data": serializer.data}, status=status.HTTP_201_CREATED)
@@ -337,17 +563,10 @@ class CourseBulkAPIView(APIView):
     @transaction.atomic
     def put(self, request):
         """Bulk Update Courses"""
-        updated = []
-        for item in request.data:
-            course_id = item.get("id")
-            if not course_id:
-                continue
-            try:
-                course = Course.objects.get(id=course_id)
-                serializer = CourseSerializer(course, data=item, partial=True)
-                if serializer.is_valid():
-                    serializer.save()
-                    updated.append(serializer.data)
-            except Course.DoesNotExist:
-                continue
+        updated = bulk_update_from_payload(
+            CourseSerializer,
+            Course.objects.select_related("program__department").prefetch_related("program__courses"),
+            request.data,
+            {"request": request},
+        )
         return Response({"message": "Courses updated successfully", "data": updated}, status=status.HTTP_200_OK)
@@ -0,0 +1,16 @@
+"""
+Celery application for backend project.
+
+Workers are started with ``celery -A backend worker -l info``; task
+modules are discovered from each installed app's ``tasks.py``.
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+app = Celery('backend')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
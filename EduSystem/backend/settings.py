@@ -94,6 +94,45 @@ DATABASES = {
     }
 }
 
+if os.environ.get("POSTGRES_DB"):
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.environ["POSTGRES_DB"],
+        "USER": os.environ.get("POSTGRES_USER", "postgres"),
+        "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+        "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
+        "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+    }
+    if os.environ.get("POSTGRES_PGBOUNCER"):
+        # pgbouncer (transaction pooling) owns the pool: keep one connection
+        # per worker alive and avoid server-side cursors it cannot route
+        DATABASES["default"].update({
+            "CONN_MAX_AGE": 60,
+            "CONN_HEALTH_CHECKS": True,
+            "DISABLE_SERVER_SIDE_CURSORS": True,
+        })
+    else:
+        # psycopg connection pool (requires psycopg[pool]); replaces CONN_MAX_AGE
+        DATABASES["default"]["OPTIONS"] = {"pool": {"min_size": 4, "max_size": 20}}
+
+# ============================================================
+# CACHE (Redis when REDIS_URL is set, per-process memory otherwise)
+# ============================================================
+REDIS_URL = os.environ.get("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 # ============================================================
 # PASSWORD VALIDATION
 # ============================================================
@@ -132,7 +171,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # ============================================================
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "app.authentication.ProfileJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
@@ -171,6 +210,14 @@ SWAGGER_SETTINGS = {
     },
 }
 
+# ============================================================
+# CELERY (background notification writes)
+# ============================================================
+CELERY_BROKER_URL = os.environ.get("CELERY_BROKER_URL", "redis://localhost:6379/0")
+CELERY_TASK_IGNORE_RESULT = True
+# Run tasks inline during development so no broker/worker is needed
+CELERY_TASK_ALWAYS_EAGER = DEBUG
+
 # ============================================================
 # LOGGING (Optional)
 # ============================================================